@@ -4,7 +4,19 @@ from app.core.config import settings
 
 # MongoDB Setup
 print("DEBUG: Connecting to MongoDB...")
-mongo_client = MongoClient(settings.MONGODB_URL)
+# One process-wide pooled client; every module imports the collections below
+# instead of opening its own connection. zstd (zstandard is pinned) with a
+# zlib fallback compresses the persona/keyword-heavy strategy documents.
+mongo_client = MongoClient(
+    settings.MONGODB_URL,
+    maxPoolSize=50,
+    minPoolSize=5,
+    maxIdleTimeMS=60_000,
+    socketTimeoutMS=10_000,
+    connectTimeoutMS=3_000,
+    serverSelectionTimeoutMS=3_000,
+    compressors="zstd,zlib"
+)
 try:
     mongo_client.admin.command('ping')
     print("DEBUG: MongoDB initialized and connected.")
@@ -42,6 +42,18 @@ class RedisCache:
         except Exception:
             return False
 
+    def incr(self, key: str, ttl: int = None):
+        """INCR the key and, if it has no TTL yet, EXPIRE it - one pipelined round trip"""
+        if not self.enabled: return None
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(key)
+            if ttl:
+                pipe.expire(key, ttl, nx=True)
+            return pipe.execute()[0]
+        except Exception:
+            return None
+
     def ping(self):
         if not self.enabled: return False
         return self.client.ping()
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from app.models.schemas import StrategyInput, StrategyResponse, HistoryResponse
 from app.dependencies.auth import get_current_user
 from app.services.strategy_service import strategy_service
 from app.services.usage_service import usage_service
+from typing import Optional
 import asyncio
+import re
 
 router = APIRouter(prefix="/api", tags=["Strategy"])
 
+_FIELD_RE = re.compile(r"^\w+$")
+
 @router.post("/strategy")
 async def generate_strategy(
     strategy_input: StrategyInput,
@@ -51,16 +55,28 @@ async def generate_strategy(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/history")
-async def get_history(current_user: dict = Depends(get_current_user)):
-    strategies = await strategy_service.get_user_history(current_user["id"])
+async def get_history(
+    limit: int = Query(50, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    strategies = await strategy_service.get_user_history(current_user["id"], limit=limit)
     return {
         "history": strategies,
         "count": len(strategies)
     }
 
 @router.get("/history/{strategy_id}")
-async def get_strategy_by_id(strategy_id: str, current_user: dict = Depends(get_current_user)):
-    strategy_doc = await strategy_service.get_strategy_by_id(strategy_id, current_user["id"])
+async def get_strategy_by_id(
+    strategy_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated top-level keys to return"),
+    current_user: dict = Depends(get_current_user)
+):
+    requested = None
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        if not all(_FIELD_RE.match(f) for f in requested):
+            raise HTTPException(status_code=400, detail="Invalid fields parameter")
+    strategy_doc = await strategy_service.get_strategy_by_id(strategy_id, current_user["id"], fields=requested)
     if not strategy_doc:
         raise HTTPException(status_code=404, detail="Strategy not found")
     return strategy_doc
@@ -5,6 +5,7 @@ from app.core.redis import redis_client
 from app.services.versioning_service import versioning_service
 from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from typing import List, Optional
 import hashlib
 import json
 
@@ -111,12 +112,23 @@ class StrategyService:
                 s["created_at"] = s["created_at"].isoformat()
         return strategies or []
 
-    async def get_strategy_by_id(self, strategy_id: str, user_id: str) -> dict:
+    async def get_strategy_by_id(self, strategy_id: str, user_id: str, fields: Optional[List[str]] = None) -> dict:
+        """
+        fields limits the fetched top-level keys; legacy docs keep them under
+        output_data, so the matching output_data.<key> paths are projected too.
+        """
+        projection = None
+        if fields:
+            projection = {}
+            for field in fields:
+                projection[field] = 1
+                if "output_data" not in fields:
+                    projection[f"output_data.{field}"] = 1
         try:
             strategy_doc = strategies_collection.find_one({
                 "_id": ObjectId(strategy_id),
                 "user_id": user_id
-            })
+            }, projection)
         except Exception:
             return None
             
@@ -260,9 +272,7 @@ class StrategyService:
         try:
             current_month = datetime.now().strftime("%Y-%m")
             count_key = f"strategy_count:{user_id}:{current_month}"
-            current_val = redis_client.get(count_key)
-            new_count = int(current_val) + 1 if current_val else 1
-            redis_client.setex(count_key, 86400, new_count)
+            redis_client.incr(count_key, ttl=86400)
         except Exception as e:
             print(f"[WARNING] Failed to increment Redis usage: {e}")
 
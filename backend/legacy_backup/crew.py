@@ -11,6 +11,7 @@ except ImportError:
     from .models import StrategyInput, ContentStrategy
 import json
 import os
+import threading
 
 # SerpAPI Tool for Real Keyword Research
 try:
@@ -29,17 +30,14 @@ llm = ChatGroq(
     groq_api_key=os.getenv("GROQ_API_KEY")
 )
 
-def create_content_strategy_crew(strategy_input: StrategyInput) -> dict:
-    """
-    Creates and executes a 4-agent CrewAI workflow for content strategy generation
-    
-    Args:
-        strategy_input: Validated input containing goal, audience, industry, platform
-        
-    Returns:
-        dict: Complete content strategy matching ContentStrategy schema
-    """
-    
+# Agents only depend on module-level config, so they are built once and reused.
+# CrewAI attaches per-run state (crew, executor) to an Agent while it executes,
+# so the cache is per thread: concurrent generations never share an instance,
+# but every request served by the same worker thread reuses its agents.
+_thread_agents = threading.local()
+
+def _build_agents() -> tuple:
+    """Construct the five elite agents, all sharing the module-level LLM client"""
     # ============================================================================
     # AGENT 1: AUDIENCE INTELLIGENCE SURGEON
     # ============================================================================
@@ -124,6 +122,29 @@ def create_content_strategy_crew(strategy_input: StrategyInput) -> dict:
         llm=llm
     )
 
+    return audience_surgeon, trend_sniper, traffic_architect, strategy_synthesizer, roi_predictor
+
+def get_agents() -> tuple:
+    """This thread's agents, built on first use"""
+    agents = getattr(_thread_agents, "agents", None)
+    if agents is None:
+        agents = _thread_agents.agents = _build_agents()
+    return agents
+
+def create_content_strategy_crew(strategy_input: StrategyInput) -> dict:
+    """
+    Creates and executes a 4-agent CrewAI workflow for content strategy generation
+    
+    Args:
+        strategy_input: Validated input containing goal, audience, industry, platform
+        
+    Returns:
+        dict: Complete content strategy matching ContentStrategy schema
+    """
+    
+    # Agents are static; each worker thread builds them once and reuses them
+    audience_surgeon, trend_sniper, traffic_architect, strategy_synthesizer, roi_predictor = get_agents()
+
     # ============================================================================
     # TASK 1: BUILD 3 DISTINCT PERSONAS
     # ============================================================================
@@ -484,7 +505,7 @@ def create_content_strategy_crew(strategy_input: StrategyInput) -> dict:
     )
 
     # Execute the crew with inputs
-    result = crew.kickoff(inputs=strategy_input.dict())
+    result = crew.kickoff(inputs=strategy_input.model_dump())
 
     # ============================================================================
     # PARSE AND STRUCTURE OUTPUT
@@ -5,27 +5,42 @@ Production-ready with JWT auth, Redis caching, rate limiting, and CrewAI integra
 
 from fastapi import FastAPI, Depends, HTTPException, status, Request, Query, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
+from functools import wraps
 import redis
+import base64
 import hashlib
+import hmac
 import json
+import orjson
 import time
 import os
-from typing import Optional
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional
 try:
     from models import StrategyInput, UserCreate, UserLogin, Token, StrategyResponse, HistoryResponse
 except ImportError:
     from .models import StrategyInput, UserCreate, UserLogin, Token, StrategyResponse, HistoryResponse
 from pydantic import BaseModel, EmailStr, Field
+from jinja2 import Environment, FileSystemLoader
 from bson import ObjectId
+from bson.errors import InvalidId
 from dotenv import load_dotenv # Added for loading environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Suppress Pydantic V2 protected namespace warning
 import warnings
 warnings.filterwarnings("ignore", message=".*Field \"model_name\" in EmbeddingOptions has conflict with protected namespace \"model_\".*")
@@ -119,16 +134,137 @@ except Exception as e:
 FREE_LIMIT = 10
 WINDOW_HOURS = 5
 
-def check_rate_limit(user_id: str, tier: str = "free") -> dict:
-    """Check if user has exceeded rate limit based on tier"""
-    # Define limits based on tier
+# In-process mirror of each user's Redis bucket. Admission is decided locally
+# while the mirror is fresh; tokens granted here are recorded as `spent` and
+# charged to Redis on the next sync. All mutation happens in synchronous code
+# on the event loop thread, so no locking is needed.
+# Each worker only holds its 1/N share of the tokens Redis reported (and refills
+# at 1/N of the rate), so N workers together can never admit more than the
+# shared bucket holds; once the share runs out the next request goes to Redis,
+# which settles the spend and hands out a fresh share. N comes from
+# WEB_CONCURRENCY, the variable uvicorn/gunicorn read their worker count from.
+LOCAL_BUCKET_SYNC_SECONDS = 60
+LOCAL_BUCKET_IDLE_SECONDS = 3600
+LOCAL_BUCKET_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+class LocalBucket:
+    __slots__ = ("tokens", "ts", "spent", "synced", "limit")
+
+    def __init__(self, tokens: float, ts: float, spent: int, synced: float, limit: int):
+        self.tokens = tokens
+        self.ts = ts
+        self.spent = spent
+        self.synced = synced
+        self.limit = limit
+
+_local_buckets: dict[str, LocalBucket] = {}
+
+def _take_local_token(user_id: str, limit: int) -> Optional[float]:
+    """Spend a token from this worker's share; returns the estimated shared remainder, None means Redis has to decide"""
+    bucket = _local_buckets.get(user_id)
+    now = time.monotonic()
+    if bucket is None or now - bucket.synced > LOCAL_BUCKET_SYNC_SECONDS:
+        return None
+    share_cap = limit / LOCAL_BUCKET_WORKERS
+    share_rate = limit / (WINDOW_HOURS * 3600) / LOCAL_BUCKET_WORKERS
+    bucket.tokens = min(share_cap, bucket.tokens + (now - bucket.ts) * share_rate)
+    bucket.ts = now
+    if bucket.tokens < 1:
+        return None
+    bucket.tokens -= 1
+    bucket.spent += 1
+    return bucket.tokens * LOCAL_BUCKET_WORKERS
+
+async def _evict_idle_buckets():
+    """Drop local buckets idle for an hour, settling any unsynced spend first"""
+    while True:
+        await asyncio.sleep(LOCAL_BUCKET_SYNC_SECONDS)
+        cutoff = time.monotonic() - LOCAL_BUCKET_IDLE_SECONDS
+        for user_id in [u for u, b in _local_buckets.items() if b.ts < cutoff]:
+            bucket = _local_buckets.pop(user_id)
+            if bucket.spent:
+                try:
+                    # cost 0: only the debt is charged
+                    await asyncio.to_thread(
+                        token_bucket,
+                        keys=[f"tb:{user_id}"],
+                        args=[bucket.limit, bucket.limit / (WINDOW_HOURS * 3600), time.time(), 0, bucket.spent]
+                    )
+                except redis.RedisError as e:
+                    print(f"[WARNING] Failed to settle local rate-limit spend for {user_id}: {e}")
+
+def _tier_limit(tier: str) -> int:
+    """Generations allowed per window for a tier"""
     if tier == "pro":
-        limit = 50  # Pro users get 50 generations per window
+        return 50  # Pro users get 50 generations per window
     elif tier == "expert":
-        limit = 100 # Expert users get 100 generations per window
-    else:
-        limit = FREE_LIMIT # Free users get 10 (default)
+        return 100 # Expert users get 100 generations per window
+    return FREE_LIMIT # Free users get 10 (default)
+
+async def check_rate_limit(user_id: str, tier: str = "free") -> dict:
+    """Check if user has exceeded rate limit based on tier"""
+    limit = _tier_limit(tier)
+
+    # Redis token bucket: one atomic round trip that both checks and records usage.
+    # Recently synced users are admitted from the in-process mirror without touching Redis.
+    if REDIS_ENABLED:
+        tokens = _take_local_token(user_id, limit)
+        if tokens is not None:
+            return {
+                "exceeded": False,
+                "used": limit - int(tokens),
+                "limit": limit
+            }
+        try:
+            return await _check_token_bucket(user_id, tier, limit)
+        except redis.RedisError as e:
+            print(f"[WARNING] Token bucket unavailable, falling back to MongoDB window: {e}")
+
+    return await asyncio.to_thread(_check_rolling_window, user_id, tier, limit)
+
+async def _check_token_bucket(user_id: str, tier: str, limit: int) -> dict:
+    """Spend one token from the user's bucket; it refills to `limit` over WINDOW_HOURS"""
+    rate = limit / (WINDOW_HOURS * 3600)
+    now = time.time()
+    bucket = _local_buckets.get(user_id)
+    debt = bucket.spent if bucket else 0
+    # Only the Redis round trip leaves the loop; the local mirror is read and replaced here
+    allowed, tokens = await asyncio.to_thread(
+        token_bucket, keys=[f"tb:{user_id}"], args=[limit, rate, now, 1, debt]
+    )
+    tokens = float(tokens)
+    used = limit - int(tokens)
+
+    # Mirror this worker's share of the shared state locally; the debt is now settled in Redis.
+    # Tokens granted locally while the script ran are not settled yet, so carry them over.
+    current = _local_buckets.get(user_id)
+    pending = 0
+    if current is not None:
+        pending = current.spent - debt if current is bucket else current.spent
+    mono = time.monotonic()
+    share = max(0.0, tokens / LOCAL_BUCKET_WORKERS - pending)
+    _local_buckets[user_id] = LocalBucket(share, mono, pending, mono, limit)
+
+    if not allowed:
+        wait = (1 - tokens) / rate
+        reset_h = int(wait // 3600)
+        reset_m = int((wait % 3600) // 60)
+        return {
+            "exceeded": True,
+            "message": f"{tier.capitalize()} tier limit ({limit}) reached. Resets in {reset_h}h {reset_m}m",
+            "reset_at": now + wait,
+            "used": used,
+            "limit": limit
+        }
 
+    return {
+        "exceeded": False,
+        "used": used,
+        "limit": limit
+    }
+
+def _check_rolling_window(user_id: str, tier: str, limit: int) -> dict:
+    """MongoDB rolling-window limiter, used when Redis is unavailable"""
     now = datetime.now(timezone.utc)
     window_start = now - timedelta(hours=WINDOW_HOURS)
     
@@ -270,11 +406,96 @@ strategies_collection = db.strategies
 
 # Create indexes
 users_collection.create_index("email", unique=True)
+# Referral codes must be unique; users without one (missing or null) stay out of the index
+users_collection.create_index(
+    "referral_code",
+    unique=True,
+    partialFilterExpression={"referral_code": {"$type": "string"}}
+)
 strategies_collection.create_index("user_id")
 strategies_collection.create_index("cache_key")
 strategies_collection.create_index("created_at")
 strategies_collection.create_index([("user_id", 1), ("created_at", -1)])
 
+# ============================================================================
+# IN-PROCESS CACHES (short-lived copies of user documents and decoded JWTs)
+# ============================================================================
+
+# get_current_user is a sync dependency, so FastAPI runs it on the threadpool -
+# the caches are guarded by a threading.Lock rather than an asyncio.Lock.
+class _TTLCache:
+    """Thread-safe LRU map whose entries each expire after their own TTL"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+USER_CACHE_TTL = 30
+USER_CACHE_MAXSIZE = 10_000
+_user_cache = _TTLCache(USER_CACHE_MAXSIZE)
+
+def get_user_cached(user_id: str) -> Optional[dict]:
+    """Return a copy of the user document (with "id"/"oid" set), hitting MongoDB at most once per TTL"""
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return dict(user)
+
+    user = users_collection.find_one({"_id": ObjectId(user_id)})
+    if user is None:
+        return None
+    user["id"] = str(user["_id"])
+    user["oid"] = user["_id"]  # Already an ObjectId - handlers filter on it without re-parsing "id"
+
+    _user_cache.set(user_id, user, USER_CACHE_TTL)
+    return dict(user)
+
+def invalidate_user(user_id) -> None:
+    """Drop a cached user document; call after every write to that user"""
+    _user_cache.pop(str(user_id))
+
+JWT_CACHE_TTL = 60
+JWT_CACHE_MAXSIZE = 10_000
+_jwt_cache = _TTLCache(JWT_CACHE_MAXSIZE)
+
+def decode_jwt(token: str) -> dict:
+    """jwt.decode with the verified claims cached per raw token; raises JWTError like jwt.decode"""
+    payload = _jwt_cache.get(token)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    # Never cache past the token's own expiry, so expired tokens are still rejected on time
+    ttl = JWT_CACHE_TTL
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _jwt_cache.set(token, payload, ttl)
+    return payload
+
 # ============================================================================
 # REDIS SETUP
 # ============================================================================
@@ -293,6 +514,50 @@ except Exception as e:
     print(f"[WARNING] Redis not available - {e}")
     print("[WARNING] Rate limiting disabled")
 
+# Deletes every key in KEYS in a single round trip, however many cache keys
+# a write has to invalidate. UNLINK frees the memory in a background thread so
+# large values never stall Redis; servers older than 4.0 fall back to DEL.
+# register_script sends EVALSHA and transparently reloads the script if the
+# server answers NOSCRIPT.
+INVALIDATE_LUA = """
+for _, k in ipairs(KEYS) do
+    if type(redis.pcall('UNLINK', k)) == 'table' then
+        redis.call('DEL', k)
+    end
+end
+return #KEYS
+"""
+invalidate_keys = redis_client.register_script(INVALIDATE_LUA) if REDIS_ENABLED else None
+
+# Token bucket for /api/strategy admission. Refills the bucket for the time
+# elapsed since the last call, spends `cost` tokens if enough are available and
+# writes the state back, all atomically - no read-modify-write race between
+# workers. Returns {allowed, remaining tokens}; the remaining count is sent as a
+# string because Redis truncates Lua numbers to integers. ARGV[5] is an optional
+# debt - tokens a worker already granted from its local bucket - that is always
+# charged, even if it drives the bucket negative.
+# KEYS[1] = bucket key, ARGV = capacity, refill rate (tokens/sec), now (sec), cost, debt
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+tokens = tokens - (tonumber(ARGV[5]) or 0)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HMSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+token_bucket = redis_client.register_script(TOKEN_BUCKET_LUA) if REDIS_ENABLED else None
+
 # ============================================================================
 # FASTAPI APP
 # ============================================================================
@@ -303,7 +568,8 @@ limiter = Limiter(key_func=get_remote_address, default_limits=[f"{RATE_LIMIT_PER
 app = FastAPI(
     title="AgentForge",
     description="AI-Powered Content Strategy Platform | 5 Elite Agents | ROI Predictions | SEO Keywords | Production SaaS",
-    version="2.0.0-production"
+    version="2.0.0-production",
+    default_response_class=ORJSONResponse
 )
 
 # Add rate limiter to app
@@ -330,6 +596,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.on_event("startup")
+async def start_local_bucket_eviction():
+    if REDIS_ENABLED:
+        asyncio.create_task(_evict_idle_buckets())
 
 # ============================================================================
 # AUTHENTICATION UTILITIES
@@ -351,28 +623,109 @@ def create_access_token(data: dict) -> str:
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_jwt(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid credentials")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+    user = get_user_cached(user_id)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
-    user["id"] = str(user["_id"])
     return user
 
+# ============================================================================
+# ENDPOINT ERROR HANDLING
+# ============================================================================
+
+def endpoint_errors(f):
+    """Turn unexpected handler errors into a logged 500; HTTPExceptions pass through untouched"""
+    @wraps(f)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await f(*args, **kwargs)
+        except HTTPException:
+            raise
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid strategy ID")
+        except Exception as e:
+            logger.exception("%s failed", f.__name__)
+            raise HTTPException(status_code=500, detail=str(e))
+    return wrapper
+
+# ============================================================================
+# STRATEGY LOADER (coalesces concurrent detail lookups into one Mongo query)
+# ============================================================================
+
+class StrategyLoader:
+    """
+    DataLoader-style batcher for strategy lookups.
+    Every load() issued in the same event-loop tick is answered by a single
+    find({"_id": {"$in": [...]}}), so a dashboard fanning out N detail
+    requests costs one Mongo round trip instead of N.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._task = None
+
+    async def load(self, strategy_id: str, user_id: str):
+        oid = ObjectId(strategy_id)  # Malformed IDs fail here, in the caller's request
+        key = (oid, user_id)
+        fut = self._pending.get(key)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._pending[key] = fut
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush())
+        # Shielded: a disconnecting client cancels only its own wait, never the
+        # future the other requests for the same ID are sharing
+        return await asyncio.shield(fut)
+
+    async def _flush(self):
+        await asyncio.sleep(0)  # Let the rest of this tick's lookups queue up
+        items, self._pending, self._task = self._pending, {}, None
+        try:
+            docs = await asyncio.to_thread(
+                lambda: list(strategies_collection.find({"_id": {"$in": [oid for oid, _ in items]}}))
+            )
+        except Exception as e:
+            for fut in items.values():
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        by_id = {d["_id"]: d for d in docs}
+        for (oid, user_id), fut in items.items():
+            doc = by_id.get(oid)
+            # Ownership is checked per caller, so one user's batch never leaks another's strategy
+            if doc is not None and doc.get("user_id") != user_id:
+                doc = None
+            if not fut.done():
+                fut.set_result(doc)
+
+
+# One loader per process: batching only helps if concurrent requests share it
+strategy_loader = StrategyLoader()
+
+
+def get_strategy_loader() -> StrategyLoader:
+    """FastAPI dependency handing the shared loader to a request"""
+    return strategy_loader
+
+class UTCJSONResponse(ORJSONResponse):
+    """ORJSONResponse that tags the naive UTC datetimes PyMongo returns with +00:00"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+
 # ============================================================================
 # CACHING UTILITIES
 # ============================================================================
 
-def generate_cache_key(strategy_input: StrategyInput) -> str:
-    version = "v2" # Force cache invalidation for blueprint merge
-    input_str = f"{version}|{strategy_input.goal}|{strategy_input.audience}|{strategy_input.industry}|{strategy_input.platform}|{strategy_input.contentType}|{strategy_input.experience}"
-    return hashlib.md5(input_str.encode()).hexdigest()
+# TTL (seconds) for cached "strategy not found" results
+MISS_CACHE_TTL = 60
 
 def get_cached_strategy(cache_key: str) -> Optional[dict]:
     if not REDIS_ENABLED:
@@ -526,11 +879,29 @@ def generate_demo_strategy(strategy_input: StrategyInput) -> dict:
 # API ENDPOINTS
 # ============================================================================
 
+HISTORY_LIST_PROJECTION = {
+    "topic": 1,
+    "goal": 1,
+    "audience": 1,
+    "industry": 1,
+    "platform": 1,
+    "experience": 1,
+    "created_at": 1,
+    "generation_time": 1,
+    "feedback_rating": 1
+}
+
 @app.get("/api/history")
-async def get_history(current_user: dict = Depends(get_current_user)):
-    strategies = list(strategies_collection.find({
-        "user_id": current_user["id"]
-    }).sort("created_at", -1).limit(50))
+async def get_history(
+    limit: int = Query(50, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    # Only the fields the history list renders - output_data (with the blueprint HTML) stays on the server.
+    # The (user_id, created_at) index serves both the filter and the sort.
+    strategies = list(strategies_collection.find(
+        {"user_id": current_user["id"]},
+        HISTORY_LIST_PROJECTION
+    ).sort("created_at", -1).limit(limit))
     
     # Serialization fix - Frontend expects 'id' not '_id'
     for s in strategies:
@@ -629,6 +1000,15 @@ def generate_experience_based_strategy(input_data: dict) -> tuple[str, list]:
     return html, base_data["sample_posts"]
 
 
+def generate_agent_strategy(strategy_input: StrategyInput) -> tuple:
+    """Run the CrewAI agents (or the demo generator); returns (strategy_dict, message)"""
+    if CREW_AI_ENABLED:
+        try:
+            return create_content_strategy_crew(strategy_input), "Strategy generated successfully"
+        except Exception as e:
+            return generate_demo_strategy(strategy_input), f"⚠️ CrewAI error, using demo: {str(e)}"
+    return generate_demo_strategy(strategy_input), "⚠️ DEMO MODE: Add GROQ_API_KEY to .env for AI generation"
+
 @app.post("/api/strategy")
 async def generate_strategy(
     strategy_input: StrategyInput,
@@ -636,17 +1016,17 @@ async def generate_strategy(
 ):
     print("DEBUG: generate_strategy endpoint CALLED (Top Location)")
     # Get user tier for rate limiting
-    user = users_collection.find_one({"_id": ObjectId(current_user["id"])})
-    tier = user.get("tier", "free")
+    # Blocking PyMongo/Redis/CrewAI calls below run on worker threads so the event loop stays free
+    tier = current_user.get("tier", "free")
     
     # OpenAI-style rate limiting (BEFORE expensive LLM call)
-    rate_info = check_rate_limit(current_user["id"], tier)
+    rate_info = await check_rate_limit(current_user["id"], tier)
     if rate_info["exceeded"]:
         raise HTTPException(status_code=429, detail=rate_info)
     
-    # Check cache
-    cache_key = generate_cache_key(strategy_input)
-    cached_strategy = get_cached_strategy(cache_key)
+    # Check cache (the key is only worth hashing when there is a cache to look in)
+    cache_key = strategy_input.cache_key if REDIS_ENABLED else None
+    cached_strategy = await asyncio.to_thread(get_cached_strategy, cache_key) if cache_key else None
     
     if cached_strategy:
         return {
@@ -661,21 +1041,15 @@ async def generate_strategy(
     start_time = time.time()
     
     # 1. Generate the Tactical Blueprint (The detailed "how-to" manual the user loves)
-    blueprint_input = strategy_input.dict()
+    blueprint_input = strategy_input.model_dump()
     blueprint_input["topic"] = strategy_input.goal[:50] # Use part of goal as topic
-    blueprint_html, sample_posts = generate_experience_based_strategy(blueprint_input)
     
     # 2. Generate the Agent Intelligence (Deep research)
-    if CREW_AI_ENABLED:
-        try:
-            strategy_dict = create_content_strategy_crew(strategy_input)
-            message = "Strategy generated successfully"
-        except Exception as e:
-            strategy_dict = generate_demo_strategy(strategy_input)
-            message = f"⚠️ CrewAI error, using demo: {str(e)}"
-    else:
-        strategy_dict = generate_demo_strategy(strategy_input)
-        message = "⚠️ DEMO MODE: Add GROQ_API_KEY to .env for AI generation"
+    # Both are independent, so the blueprint render overlaps the LLM call
+    (blueprint_html, sample_posts), (strategy_dict, message) = await asyncio.gather(
+        asyncio.to_thread(generate_experience_based_strategy, blueprint_input),
+        asyncio.to_thread(generate_agent_strategy, strategy_input)
+    )
     
     # 3. Merge both into the response
     # We add the blueprint_html to the strategy_dict so the UI can render it in a new tab
@@ -684,12 +1058,6 @@ async def generate_strategy(
     
     generation_time = time.time() - start_time
     
-    # Cache result ONLY if successful (don't cache demo fallback on error)
-    if "CrewAI error" not in message:
-        set_cached_strategy(cache_key, strategy_dict)
-    else:
-        print(f"[CACHE] Skipping cache for failed generation: {message}")
-    
     # Extract the actual strategy content to avoid nesting issues
     # CrewAI returns: {strategy: {personas: [], keywords: [], ...}, personas: [], ...}
     # We only want the inner 'strategy' object
@@ -715,26 +1083,20 @@ async def generate_strategy(
         "generation_time": int(generation_time),
         "created_at": datetime.now(timezone.utc)
     }
-    result = strategies_collection.insert_one(strategy_doc)
-    strategy_doc["_id"] = str(result.inserted_id)
+    # The Mongo insert (kept at w=1 so /api/history reads its own write) and the
+    # Redis cache write are independent, so they run side by side
+    writes = [asyncio.to_thread(strategies_collection.insert_one, strategy_doc)]
     
-    # Increment usage count
-    if REDIS_ENABLED:
-        try:
-            current_month = datetime.now().strftime("%Y-%m")
-            count_key = f"strategy_count:{current_user['id']}:{current_month}"
-            
-            # Get current or 0
-            current_val = redis_client.get(count_key)
-            new_count = int(current_val) + 1 if current_val else 1
-            
-            # Set with 24h expiry (rolling)
-            redis_client.setex(count_key, 86400, new_count)
-            print(f"[USAGE] Usage incremented for {current_user['id']}: {new_count}/3")
-        except Exception as e:
-            print(f"[WARNING] Failed to increment usage: {e}")
+    # Cache result ONLY if successful (don't cache demo fallback on error)
+    if cache_key:
+        if "CrewAI error" not in message:
+            writes.append(asyncio.to_thread(set_cached_strategy, cache_key, strategy_dict))
+        else:
+            print(f"[CACHE] Skipping cache for failed generation: {message}")
     
+    await asyncio.gather(*writes)
     
+    # Usage was already recorded by the token bucket in check_rate_limit
     
     # Strategy content already extracted and merged above (lines 2118-2127)
     # Using 'clean_strategy' variable which contains blueprint and sample_posts
@@ -750,6 +1112,16 @@ async def generate_strategy(
         "tier": tier
     }
 
+@app.post("/api/strategy/blueprint")
+async def stream_strategy_blueprint(
+    strategy_input: StrategyInput,
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream just the Tactical Blueprint HTML so the UI can render it while it arrives"""
+    blueprint_input = strategy_input.model_dump()
+    blueprint_input["topic"] = strategy_input.goal[:50] # Same topic derivation as /api/strategy
+    return StreamingResponse(iter_blueprint_chunks(blueprint_input), media_type="text/html")
+
 @app.get("/")
 async def root():
     return {
@@ -813,43 +1185,72 @@ async def get_me(current_user: dict = Depends(get_current_user)):
         "created_at": current_user.get("created_at")
     }
 
-@app.get("/api/history/{strategy_id}")
-async def get_strategy(strategy_id: str, current_user: dict = Depends(get_current_user)):
+@app.get("/api/history/{strategy_id}", response_class=UTCJSONResponse)
+@endpoint_errors
+async def get_strategy(
+    strategy_id: str,
+    current_user: dict = Depends(get_current_user),
+    loader: StrategyLoader = Depends(get_strategy_loader)
+):
     # Verify valid ObjectId
     if not ObjectId.is_valid(strategy_id):
         raise HTTPException(status_code=400, detail="Invalid strategy ID")
         
-    # Find strategy
-    strategy = strategies_collection.find_one({
-        "_id": ObjectId(strategy_id),
-        "user_id": current_user["id"]
-    })
+    # Repeated lookups of a deleted/unknown ID are answered from Redis, not Mongo
+    miss_key = f"miss:strategy:{current_user['id']}:{strategy_id}"
+    if REDIS_ENABLED:
+        try:
+            if await asyncio.to_thread(redis_client.get, miss_key):
+                raise HTTPException(status_code=404, detail="Strategy not found")
+        except redis.RedisError:
+            pass
+
+    # Find strategy (only if it belongs to this user), batched with concurrent lookups
+    strategy = await loader.load(strategy_id, current_user["id"])
     
     if not strategy:
+        if REDIS_ENABLED:
+            try:
+                # Short TTL so an ID that starts existing is never hidden for long
+                await asyncio.to_thread(redis_client.set, miss_key, "1", ex=MISS_CACHE_TTL)
+            except redis.RedisError:
+                pass
         raise HTTPException(status_code=404, detail="Strategy not found")
         
-    # Serialize ID and Dates - Frontend expects 'id' not '_id'
+    # Serialize ID - Frontend expects 'id' not '_id'
     strategy["id"] = str(strategy["_id"])  # Add 'id' field for frontend
     strategy["_id"] = str(strategy["_id"])
-    if isinstance(strategy.get("created_at"), datetime):
-        strategy["created_at"] = strategy["created_at"].isoformat()
         
-    return strategy
+    # Returned as a response object so orjson serializes created_at itself (as UTC)
+    return UTCJSONResponse(strategy)
 
 @app.delete("/api/history/{strategy_id}")
+@endpoint_errors
 async def delete_strategy(strategy_id: str, current_user: dict = Depends(get_current_user)):
     # Verify valid ObjectId
     if not ObjectId.is_valid(strategy_id):
         raise HTTPException(status_code=400, detail="Invalid strategy ID")
         
-    # Attempt delete (must ensure user owns the strategy)
-    result = strategies_collection.delete_one({
-        "_id": ObjectId(strategy_id),
-        "user_id": current_user["id"]
-    })
+    # Attempt delete (must ensure user owns the strategy) off the event loop.
+    # find_one_and_delete hands back the cache_key in the same round trip.
+    deleted = await asyncio.to_thread(
+        strategies_collection.find_one_and_delete,
+        {"_id": ObjectId(strategy_id), "user_id": current_user["id"]},
+        projection={"cache_key": 1}
+    )
     
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Strategy not found or unauthorized")
+
+    # Drop the cached copy of this generation (UNLINK, so large values are freed
+    # off Redis' main thread). Rate limits are deliberately left alone: deleting
+    # a strategy must never restore usage credits.
+    if REDIS_ENABLED and deleted.get("cache_key"):
+        stale_keys = [f"strategy:{deleted['cache_key']}"]
+        try:
+            await asyncio.to_thread(invalidate_keys, keys=stale_keys)
+        except redis.RedisError as e:
+            logger.warning("Failed to invalidate cache for %s: %s", strategy_id, e)
         
     return {"message": "Strategy deleted successfully"}
 
@@ -1039,9 +1440,10 @@ async def admin_users(
         ]))
         
         # Convert ObjectId to string for JSON serialization
+        now = datetime.now(timezone.utc)  # Fallback for users without created_at; one clock read for the page
         for user in users:
             user["_id"] = str(user["_id"])
-            user["created_at"] = user.get("created_at", datetime.now(timezone.utc)).isoformat()
+            user["created_at"] = user.get("created_at", now).isoformat()
         
         # Calculate totals
         total = users_collection.count_documents(query)
@@ -1170,8 +1572,7 @@ async def admin_alerts(admin: bool = Depends(admin_auth)):
 async def get_usage(current_user: dict = Depends(get_current_user)):
     """Get current usage for live counter - updates every 30s"""
     try:
-        user = users_collection.find_one({"_id": ObjectId(current_user["id"])})
-        tier = user.get("tier", "free")
+        tier = current_user.get("tier", "free")
         
         if tier == "pro":
             return {
@@ -1263,930 +1664,181 @@ if __name__ == "__main__":
 
 
 # ============================================================================
-@app.delete("/api/history/{strategy_id}")
-async def delete_strategy(strategy_id: str, current_user: dict = Depends(get_current_user)):
-    """Delete a specific strategy and reset usage count"""
-    try:
-        result = strategies_collection.delete_one({
-            "_id": ObjectId(strategy_id),
-            "user_id": current_user["id"]
-        })
-        
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Strategy not found or unauthorized")
-            
-        # Optional: Reset rate limit counter on delete to be user-friendly
-        if REDIS_ENABLED:
-            try:
-                current_month = datetime.now().strftime("%Y-%m")
-                count_key = f"strategy_count:{current_user['id']}:{current_month}"
-                redis_client.delete(count_key)
-                print(f"♻️  Usage reset for {current_user['id']} after deletion")
-            except Exception as e:
-                print(f"⚠️ Failed to reset usage: {e}")
-        return {"success": True, "message": "Strategy deleted and usage reset"}
-        
-    except Exception as e:
-        print(f"❌ Delete error: {e}")
-        raise HTTPException(status_code=404, detail="Strategy not found")
+# TOPIC VIEW (per-request derived strings for the blueprint renderers)
+# ============================================================================
+
+@dataclass(slots=True, frozen=True)
+class TopicView:
+    """Request fields plus the topic derivations the renderers interpolate"""
+    topic: str
+    upper: str
+    slug: str
+    goal: str
+    audience: str
+    industry: str
+    platform: str
+    content_type: str
+
+
+def make_topic_view(data: dict) -> TopicView:
+    """Build the TopicView once per request so renderers reuse the derived strings"""
+    topic = data.get("topic", "Business")
+    return TopicView(
+        topic=topic,
+        upper=topic.upper(),
+        slug=topic.replace(" ", ""),
+        goal=data.get("goal", ""),
+        audience=data.get("audience", ""),
+        industry=data.get("industry", "General"),
+        platform=data.get("platform", "Instagram"),
+        content_type=data.get("contentType", "Reels")
+    )
+
 
 # ============================================================================
-# HISTORY ENDPOINTS (Order matters! General routes before parameterized ones)
+# SAMPLE POST TEMPLATES
 # ============================================================================
+# Static per experience level; only topic/audience/industry vary per request,
+# so the structure is built once at import and filled in by _render_sample_posts.
+
+_GENERAL_POSTS_TPL = (
+    {
+        "type": "General Post",
+        "hook": "How to get started with {topic} today.",
+        "body": "Share your best tip for beginners and common mistakes to avoid.",
+        "cta": "Like and share if this helped!"
+    },
+)
 
+_BEGINNER_POSTS_TPL = (
+    {
+        "type": "Reel / Video",
+        "hook": "The one thing nobody tells you about {topic}...",
+        "body": "Show a quick 5-second clip of you working or a 'before' vs 'after' result.",
+        "cta": "Read the caption for my secret!"
+    },
+    {
+        "type": "Educational",
+        "hook": "3 simple steps to master {topic} for {audience}.",
+        "body": "Step 1: Focus on quality. Step 2: Use the right tools. Step 3: Be consistent.",
+        "cta": "Follow for more {topic} tips!"
+    },
+)
 
-@app.get("/api/history/{strategy_id}")
-async def get_strategy_by_id(strategy_id: str, current_user: dict = Depends(get_current_user)):
-    """Get a specific strategy by ID"""
-    try:
-        # Fetch the strategy (only if it belongs to this user)
-        strategy = strategies_collection.find_one({
-            "_id": ObjectId(strategy_id),
-            "user_id": current_user["id"]
-        })
-        
-        if not strategy:
-            raise HTTPException(status_code=404, detail="Strategy not found")
-        
-        # Format response - CRITICAL: Include output_data which has the tactical_blueprint
-        return {
-            "id": str(strategy["_id"]),
-            "topic": strategy.get("topic", strategy.get("goal", "Untitled Strategy")),
-            "goal": strategy.get("goal"),
-            "audience": strategy.get("audience"),
-            "industry": strategy.get("industry"),
-            "platform": strategy.get("platform"),
-            "experience": strategy.get("experience", "beginner"),
-            "output_data": strategy.get("output_data", {}),
-            "created_at": strategy.get("created_at").isoformat() if strategy.get("created_at") else None,
-            "generation_time": strategy.get("generation_time", "Unknown"),
-            "feedback": strategy.get("feedback")
-        }
-        
-    except Exception as e:
-        print(f"❌ Get strategy error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+_INTERMEDIATE_POSTS_TPL = (
+    {
+        "type": "Batch Reel",
+        "hook": "Why most {audience} are failing at {topic} in 2024...",
+        "body": "Talking head with fast-paced B-roll of your automated system or workflow.",
+        "cta": "Check my link for the free automation toolkit!"
+    },
+    {
+        "type": "Carousel",
+        "hook": "My $0 to $10k {topic} Blueprint",
+        "body": "Show screenshots of results + step-by-step roadmap.",
+        "cta": "Tag a friend who needs to scale!"
+    },
+)
 
+_EXPERT_POSTS_TPL = (
+    {
+        "type": "Thought Leadership",
+        "hook": "The {industry} industry is lying to you about {topic}.",
+        "body": "Challenge a common myth with data-backed counter-points. Use a contrarian approach to build authority.",
+        "cta": "Join my masterclass for the full breakdown."
+    },
+    {
+        "type": "Case Study",
+        "hook": "How we helped a client achieve their {topic} goals in 28 days.",
+        "body": "Highlight the specific 'Amethyst' framework applied and the ROI achieved. Show real data and results.",
+        "cta": "Apply for a 1:1 strategy audit today."
+    },
+)
+
+
+# ============================================================================
+# BLUEPRINT TEMPLATES (compiled once at import; HTML lives in templates/)
+# ============================================================================
+
+_TEMPLATE_ENV = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")),
+    autoescape=True,  # topic/goal/audience are user input
+    keep_trailing_newline=True
+)
+_BEGINNER_TEMPLATE = _TEMPLATE_ENV.get_template("blueprint_beginner.html")
+_INTERMEDIATE_TEMPLATE = _TEMPLATE_ENV.get_template("blueprint_intermediate.html")
+_EXPERT_TEMPLATE = _TEMPLATE_ENV.get_template("blueprint_expert.html")
+_GENERAL_TEMPLATE = _TEMPLATE_ENV.get_template("blueprint_general.html")
+_BLUEPRINT_TEMPLATES = {
+    "beginner": _BEGINNER_TEMPLATE,
+    "intermediate": _INTERMEDIATE_TEMPLATE,
+    "expert": _EXPERT_TEMPLATE,
+}
+
+
+def _render_sample_posts(templates: tuple, **fields) -> list:
+    """Fill a sample post template tuple with the request-specific fields"""
+    return [{k: v.format(**fields) for k, v in post.items()} for post in templates]
 
 
 def generate_experience_based_strategy(data: dict) -> str:
     """Route to appropriate strategy based on experience level"""
     experience = data.get("experience", "beginner").lower()
-    topic = data.get("topic", "Business")
-    goal = data.get("goal", "")
-    audience = data.get("audience", "")
-    industry = data.get("industry", "General")
-    platform = data.get("platform", "Instagram")
-    content_type = data.get("contentType", "Reels")
+    view = make_topic_view(data)
     
     if experience == "beginner":
-        return generate_beginner_strategy(topic, goal, audience, industry, platform, content_type)
+        return generate_beginner_strategy(view)
     elif experience == "intermediate":
-        return generate_intermediate_strategy(topic, goal, audience, industry, platform, content_type)
+        return generate_intermediate_strategy(view)
     elif experience == "expert":
-        return generate_expert_strategy(topic, goal, audience, industry, platform, content_type)
+        return generate_expert_strategy(view)
     else:
         # Fallback to dummy posts for generic template
-        blueprint_html = generate_strategy_template(topic)
-        sample_posts = [
-            {
-                "type": "General Post",
-                "hook": f"How to get started with {topic} today.",
-                "body": "Share your best tip for beginners and common mistakes to avoid.",
-                "cta": "Like and share if this helped!"
-            }
-        ]
+        blueprint_html = generate_strategy_template(view.topic)
+        sample_posts = _render_sample_posts(_GENERAL_POSTS_TPL, topic=view.topic)
         return blueprint_html, sample_posts
 
 
-def generate_beginner_strategy(topic, goal, audience, industry, platform, content_type):
+def iter_blueprint_chunks(data: dict) -> Iterator[str]:
+    """Yield the blueprint HTML piece by piece as Jinja2 renders it (same markup as the JSON endpoint)"""
+    view = make_topic_view(data)
+    template = _BLUEPRINT_TEMPLATES.get(data.get("experience", "beginner").lower())
+    if template is None:
+        return _GENERAL_TEMPLATE.generate(topic=view.topic)
+    return template.generate(view=view)
+
+
+def generate_beginner_strategy(view: TopicView):
     """Beginner: Copy-paste scripts + iPhone guides"""
-    return f"""
-<div class="strategy-sections">
-    <div class="bp-badge">🎯 Beginner Mode</div>
-
-    <h1>{topic.upper()} BLUEPRINT</h1>
-
-    <section class="bp-section">
-        <h2>1. Business Goal</h2>
-        <p><strong>Primary Objective:</strong> {goal or f'Grow {topic} presence on {platform}'}</p>
-        <p><strong>90-Day Target:</strong> 10,000 engaged followers and 200 qualified leads through consistent {content_type}.</p>
-    </section>
-
-    <section class="bp-section">
-        <h2>2. Target Audience</h2>
-        <p><strong>Who they are:</strong> {audience or 'Aspiring enthusiasts in your niche'}</p>
-        <p><strong>Key Pain Point:</strong> Overwhelmed by complex tech and looking for simple, actionable advice.</p>
-    </section>
-
-    <section class="bp-section">
-        <h2>3. The Content Formula</h2>
-        <p><strong>Your Angle:</strong> "The Friendly Guide" — Documenting the journey, not just the destination.</p>
-        <ul class="bp-check-list">
-            <li>Keep videos under 30 seconds</li>
-            <li>Use natural lighting (iPhone only)</li>
-            <li>Add captions with high contrast</li>
-        </ul>
-    </section>
-
-    <section class="bp-section">
-        <h2>4. Beginner "Copy-Paste" Script</h2>
-        <ul class="bp-step-list">
-            <li><strong>Hook (0-3s):</strong> "I used to struggle with {topic} until I found this..."</li>
-            <li><strong>Value (3-12s):</strong> [Show one simple trick or behind-the-scenes clip]</li>
-            <li><strong>CTA (12-15s):</strong> "Comment 'HELP' if you want the PDF guide!"</li>
-        </ul>
-    </section>
-
-    <section class="bp-section">
-        <h2>5. 30-Day Growth Roadmap</h2>
-        <div class="bp-table-container">
-            <table>
-                <thead>
-                    <tr><th>Phase</th><th>Followers</th><th>Action</th></tr>
-                </thead>
-                <tbody>
-                    <tr><td>Week 1-2</td><td>100-500</td><td>Post 3x weekly, engage daily</td></tr>
-                    <tr><td>Week 3-4</td><td>500-1,500</td><td>Analyze top post, create similar</td></tr>
-                    <tr><td>Month 2</td><td>1,500-5,000</td><td>Collaborate with similar accounts</td></tr>
-                </tbody>
-            </table>
-        </div>
-    </section>
-
-    <section class="bp-section">
-        <h2>6. Common Pitfalls</h2>
-        <ul class="bp-avoid-list">
-            <li>Buying followers (kills engagement)</li>
-            <li>Posting without a caption</li>
-            <li>Giving up before 90 days</li>
-        </ul>
-    </section>
-</div>
-"""
+    blueprint_html = _BEGINNER_TEMPLATE.render(view=view)
     
-    sample_posts = [
-        {
-            "type": "Reel / Video",
-            "hook": f"The one thing nobody tells you about {topic}...",
-            "body": "Show a quick 5-second clip of you working or a 'before' vs 'after' result.",
-            "cta": "Read the caption for my secret!"
-        },
-        {
-            "type": "Educational",
-            "hook": f"3 simple steps to master {topic} for {audience}.",
-            "body": "Step 1: Focus on quality. Step 2: Use the right tools. Step 3: Be consistent.",
-            "cta": f"Follow for more {topic} tips!"
-        }
-    ]
+    sample_posts = _render_sample_posts(_BEGINNER_POSTS_TPL, topic=view.topic, audience=view.audience)
     
     return blueprint_html, sample_posts
 
 
 
 
-def generate_intermediate_strategy(topic, goal, audience, industry, platform, content_type):
+def generate_intermediate_strategy(view: TopicView):
     """Intermediate: Canva workflows + efficiency"""
-    return f"""
-<div class="strategy-sections">
-    <div class="bp-badge">⚡ Intermediate Mode</div>
-
-    <h1>{topic.upper()} EFFICIENCY GUIDE</h1>
-
-    <section class="bp-section">
-        <h2>1. Business Goal</h2>
-        <p><strong>Primary Objective:</strong> {goal or f'Scale {topic} to 50K followers'}</p>
-        <p><strong>90-Day Target:</strong> 50,000 engaged followers and 1,000 qualified leads through optimized content workflows.</p>
-    </section>
-
-    <section class="bp-section">
-        <h2>2. Target Audience & Positioning</h2>
-        <p><strong>Primary Audience:</strong> {audience or 'Professionals seeking efficiency'}</p>
-        <p><strong>Brand Angle:</strong> The Efficient Expert — High quality visuals meets smart automation.</p>
-        <p><strong>Pillar Framework:</strong> 40% Educational, 30% Case Studies, 20% Tools, 10% Personal.</p>
-    </section>
-
-<section class="strategy-section" style="background: #DBEAFE; padding: 1.5rem; border-radius: 1rem;">
-<h2 style="color: #1E40AF;">5. EXECUTION PLAN (CANVA WORKFLOWS)</h2>
-
-<h3 style="color: #7C3AED; margin-top: 1rem;">🎨 CANVA TEMPLATE SYSTEM</h3>
-<div style="background: white; padding: 1rem; border-radius: 0.5rem; margin-top: 0.5rem;">
-<p><strong>Create 3 Master Templates:</strong></p>
-
-<p style="margin-top: 1rem;"><strong>Template 1: Hook Overlay</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Yellow text with black outline (high contrast)</li>
-<li>Font: Montserrat Bold, 72pt</li>
-<li>Position: Top third of screen</li>
-<li>Animation: Fade in (0.5s)</li>
-</ul>
-
-<p style="margin-top: 1rem;"><strong>Template 2: CTA Sticker</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Design: "DM 'START' NOW" + Arrow pointing right</li>
-<li>Colors: Brand colors (purple/pink gradient)</li>
-<li>Size: 300x150px</li>
-<li>Position: Bottom right corner</li>
-</ul>
-
-<p style="margin-top: 1rem;"><strong>Template 3: Progress Bar</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Before/After split screen design</li>
-<li>Progress indicator (0% → 100%)</li>
-<li>Timestamp overlays</li>
-</ul>
-</div>
-
-<h3 style="color: #7C3AED; margin-top: 1.5rem;">⚙️ BATCH CREATION WORKFLOW</h3>
-<div style="background: white; padding: 1rem; border-radius: 0.5rem; margin-top: 0.5rem;">
-<p><strong>Monday (2 hours) - Content Day:</strong></p>
-<ol style="margin-left: 1.5rem;">
-<li><strong>Film (30 min):</strong> Record 5 raw videos back-to-back</li>
-<li><strong>Canva (45 min):</strong> Add graphics to all 5 videos
-  <ul style="margin-left: 1rem;">
-    <li>Import video to Canva</li>
-    <li>Apply master template</li>
-    <li>Customize text (5 min per video)</li>
-    <li>Export as MP4</li>
-  </ul>
-</li>
-<li><strong>CapCut (30 min):</strong> Add audio + transitions
-  <ul style="margin-left: 1rem;">
-    <li>Import from Canva</li>
-    <li>Add trending audio</li>
-    <li>Speed adjustments (1.1x-1.3x)</li>
-    <li>Smooth transitions</li>
-  </ul>
-</li>
-<li><strong>Schedule (15 min):</strong> Upload to Later/Planoly for the week</li>
-</ol>
-
-<p style="margin-top: 1rem;"><strong>Result:</strong> 5 professional Reels in 2 hours = 15 min per Reel</p>
-</div>
-
-<h3 style="color: #7C3AED; margin-top: 1.5rem;">📊 CONTENT CALENDAR (Copy This)</h3>
-<div style="background: white; padding: 1rem; border-radius: 0.5rem; margin-top: 0.5rem;">
-<table style="width: 100%; border-collapse: collapse;">
-<tr style="background: #F3F4F6;">
-<th style="border: 1px solid #E5E7EB; padding: 0.5rem;">Day</th>
-<th style="border: 1px solid #E5E7EB; padding: 0.5rem;">Content Type</th>
-<th style="border: 1px solid #E5E7EB; padding: 0.5rem;">Canva Template</th>
-</tr>
-<tr>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Mon 8AM</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Educational</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Hook Overlay</td>
-</tr>
-<tr style="background: #F9FAFB;">
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Wed 1PM</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Case Study</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Progress Bar</td>
-</tr>
-<tr>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Fri 7PM</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">Tool/Resource</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.5rem;">CTA Sticker</td>
-</tr>
-</table>
-</div>
-</section>
-
-<section class="strategy-section">
-<h2>6. OPTIMIZATION STRATEGY</h2>
-<p><strong>Weekly Review (30 min every Sunday):</strong></p>
-<ol style="margin-left: 1.5rem;">
-<li>Check Instagram Insights for top 3 performing Reels</li>
-<li>Identify common elements (hook, topic, format)</li>
-<li>Create 2 variations of winning formula for next week</li>
-<li>Archive or delete bottom 20% performers</li>
-</ol>
-</section>
-
-<section class="strategy-section">
-<h2>7. TOOLS STACK</h2>
-<div style="background: #F3F4F6; padding: 1rem; border-radius: 0.5rem;">
-<p><strong>Essential Tools:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li><strong>Canva Pro:</strong> $12.99/mo - Templates + brand kit</li>
-<li><strong>CapCut:</strong> Free - Video editing</li>
-<li><strong>Later:</strong> $18/mo - Scheduling</li>
-<li><strong>Notion:</strong> Free - Content calendar</li>
-</ul>
-<p style="margin-top: 0.5rem;"><strong>Total Cost:</strong> ~$31/month for professional workflow</p>
-</div>
-</section>
-
-<section class="strategy-section">
-<h2>8. GROWTH METRICS</h2>
-<p><strong>Track Weekly:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Follower growth rate (%)</li>
-<li>Engagement rate (likes + comments + saves / followers)</li>
-<li>Best performing content type</li>
-<li>Optimal posting times</li>
-</ul>
-<p><strong>Goal:</strong> 5-10% engagement rate, 1000+ followers/week by Month 2</p>
-</section>
-
-<section class="strategy-section">
-<h2>9. COLLABORATION STRATEGY</h2>
-<p><strong>Month 2-3: Partner with 5-10 accounts</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Similar follower count (±20%)</li>
-<li>Same niche, non-competing</li>
-<li>Cross-promote each other's content</li>
-<li>Joint Lives or challenges</li>
-</ul>
-</section>
-
-<section class="strategy-section">
-<h2>10. 90-DAY ROADMAP</h2>
-<div style="background: #DBEAFE; padding: 1rem; border-radius: 0.5rem;">
-<p><strong>Month 1:</strong> Build workflow, post 5x/week, reach 5K followers</p>
-<p><strong>Month 2:</strong> Optimize top performers, collaborate, reach 20K followers</p>
-<p><strong>Month 3:</strong> Scale with ads ($200-500), launch offer, reach 50K followers</p>
-</div>
-</section>
-
-<section class="strategy-section" style="background: #FEF3C7; padding: 1.5rem; border-radius: 1rem;">
-<h2 style="color: #92400E;">⚠️ INTERMEDIATE REALITY CHECK</h2>
-<p style="color: #065F46;"><strong>✅ This works if:</strong> You batch create, track metrics, and optimize weekly</p>
-<p style="color: #991B1B; margin-top: 0.5rem;"><strong>❌ This fails if:</strong> You create content daily without analyzing performance</p>
-</section>
-
-</div>
-"""
+    blueprint_html = _INTERMEDIATE_TEMPLATE.render(view=view)
     
-    sample_posts = [
-        {
-            "type": "Batch Reel",
-            "hook": f"Why most {audience} are failing at {topic} in 2024...",
-            "body": "Talking head with fast-paced B-roll of your automated system or workflow.",
-            "cta": "Check my link for the free automation toolkit!"
-        },
-        {
-            "type": "Carousel",
-            "hook": f"My $0 to $10k {topic} Blueprint",
-            "body": "Show screenshots of results + step-by-step roadmap.",
-            "cta": "Tag a friend who needs to scale!"
-        }
-    ]
+    sample_posts = _render_sample_posts(_INTERMEDIATE_POSTS_TPL, topic=view.topic, audience=view.audience)
     
     return blueprint_html, sample_posts
 
 
-def generate_expert_strategy(topic, goal, audience, industry, platform, content_type):
+def generate_expert_strategy(view: TopicView):
     """Expert: Viral frameworks + A/B testing"""
-    return f"""
-<div class="strategy-sections">
-    <div class="bp-badge">🚀 Expert Mode</div>
-
-    <h1>{topic.upper()} AUTHORITY PLAN</h1>
-
-    <section class="bp-section">
-        <h2>1. Business Goal & Audience</h2>
-        <p><strong>Core Objective:</strong> {goal or f'Dominate {industry} on {platform}'}</p>
-        <p><strong>Psychographic:</strong> {audience or 'High-intent buyers looking for authority.'}</p>
-        <p><strong>Target ROI:</strong> 100,000+ followers and $50K revenue in 90 days.</p>
-    </section>
-
-<h3 style="color: #8B5CF6; margin-top: 1rem;">🎯 HOOK FORMULAS (3 Proven Frameworks)</h3>
-    <section class="bp-section">
-        <h2>2. Expert Frameworks</h2>
-        <div class="grid grid-cols-1 md:grid-cols-2 gap-4">
-            <div class="p-4 rounded-2xl bg-white/50 dark:bg-gray-800/30">
-                <h3>Problem-Agitate-Solve</h3>
-                <ul class="bp-step-list">
-                    <li><strong>Hook:</strong> "I wasted 2 years on..."</li>
-                    <li><strong>Agitate:</strong> "Lost $10K and hours..."</li>
-                    <li><strong>Solve:</strong> "Until I found [Method]"</li>
-                </ul>
-            </div>
-            <div class="p-4 rounded-2xl bg-white/50 dark:bg-gray-800/30">
-                <h3>The Contrarian Take</h3>
-                <ul class="bp-step-list">
-                    <li><strong>Hook:</strong> "{industry} gurus are lying"</li>
-                    <li><strong>Expose:</strong> "They say X, but Y is true"</li>
-                    <li><strong>CTA:</strong> "Save this before it's deleted"</li>
-                </ul>
-            </div>
-        </div>
-    </section>
-
-    <section class="bp-section">
-        <h2>3. Hashtag Clusters (KD &lt; 25)</h2>
-        <div class="p-4 rounded-2xl bg-white/50 dark:bg-gray-800/30 font-mono text-sm leading-relaxed">
-            <p class="text-primary-600 mb-2"><strong>Mega (100K-1M):</strong> #{industry}tips #{platform}marketing #viral{content_type}</p>
-            <p class="text-secondary-600 mb-2"><strong>Medium (10K-100K):</strong> #{industry}strategy #{topic.replace(' ', '')}growth #contentmarketing</p>
-            <p class="text-gray-500"><strong>Niche (1K-10K):</strong> #{industry}2024 #{topic.replace(' ', '')}tips #{platform}algorithm</p>
-        </div>
-    </section>
-
-    <section class="bp-section">
-        <h2>4. A/B Testing Matrix</h2>
-        <div class="bp-table-container">
-            <table>
-                <thead>
-                    <tr><th>Week</th><th>Test Variable</th><th>Winner Action</th></tr>
-                </thead>
-                <tbody>
-                    <tr><td>W1</td><td>Hook Type</td><td>Scale winning hook 3x</td></tr>
-                    <tr><td>W2</td><td>Posting Time</td><td>Lock in optimal slot</td></tr>
-                    <tr><td>W3</td><td>CTA Type</td><td>Replicate top conversion</td></tr>
-                </tbody>
-            </table>
-        </div>
-    </section>
-
-<h3 style="color: #8B5CF6; margin-top: 1.5rem;">5. CONVERSION FUNNEL</h3>
-<div style="background: white; padding: 1rem; border-radius: 0.5rem; margin-top: 0.5rem;">
-<p><strong>Stage 1: Awareness (Viral Content)</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Hook-driven Reels (10M+ reach target)</li>
-<li>Controversial takes (high engagement)</li>
-<li>CTA: "Follow for daily tips"</li>
-</ul>
-
-<p style="margin-top: 1rem;"><strong>Stage 2: Consideration (Authority Content)</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Case studies with metrics</li>
-<li>Behind-the-scenes of results</li>
-<li>CTA: "DM 'STRATEGY' for free guide"</li>
-</ul>
-
-<p style="margin-top: 1rem;"><strong>Stage 3: Conversion (Direct Offer)</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Limited-time offers</li>
-<li>Testimonial compilations</li>
-<li>CTA: "Link in bio - 24hr only"</li>
-</ul>
-</div>
-</section>
-
-<section class="strategy-section">
-<h2>6. ANALYTICS DASHBOARD</h2>
-<p><strong>Track Daily (Non-Negotiable):</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li><strong>Engagement Rate:</strong> Target >15% (likes+comments+saves/followers)</li>
-<li><strong>Reach Rate:</strong> Target >50% (reach/followers)</li>
-<li><strong>Save Rate:</strong> Target >5% (saves/reach) - Highest signal</li>
-<li><strong>Share Rate:</strong> Target >2% (shares/reach) - Viral indicator</li>
-<li><strong>Profile Visit Rate:</strong> Target >10% (visits/reach)</li>
-<li><strong>Follower Conversion:</strong> Target >3% (new followers/profile visits)</li>
-</ul>
-
-<p style="margin-top: 1rem;"><strong>Tools:</strong> Instagram Insights + Metricool + Google Sheets automation</p>
-</section>
-
-<section class="strategy-section">
-<h2>7. PAID AMPLIFICATION</h2>
-<p><strong>Month 2-3: $1,000-2,000 Ad Budget</strong></p>
-<div style="background: #F3F4F6; padding: 1rem; border-radius: 0.5rem; margin-top: 0.5rem;">
-<p><strong>Strategy:</strong></p>
-<ol style="margin-left: 1.5rem;">
-<li>Identify top 3 organic performers (>20% engagement)</li>
-<li>Boost with $50-100 each</li>
-<li>Target: Lookalike audience (1% of followers)</li>
-<li>Objective: Reach + Engagement</li>
-<li>Scale winners to $500+</li>
-</ol>
-<p style="margin-top: 0.5rem;"><strong>Expected ROI:</strong> $1 ad spend = 50-100 new followers (if content is proven)</p>
-</div>
-</section>
-
-<section class="strategy-section">
-<h2>8. INFLUENCER COLLABORATION</h2>
-<p><strong>Target: 10-20 micro-influencers (10K-100K followers)</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Engagement rate >10%</li>
-<li>Audience overlap >30%</li>
-<li>Collaboration: Shoutout-for-shoutout or paid ($100-500)</li>
-<li>Expected: 500-2000 new followers per collab</li>
-</ul>
-</section>
-
-<section class="strategy-section">
-<h2>9. CONTENT REPURPOSING</h2>
-<p><strong>1 Viral Reel → 10 Content Pieces:</strong></p>
-<ol style="margin-left: 1.5rem;">
-<li>Original Reel on Instagram</li>
-<li>Repost on TikTok</li>
-<li>YouTube Shorts</li>
-<li>LinkedIn carousel (screenshots)</li>
-<li>Twitter thread</li>
-<li>Email newsletter</li>
-<li>Blog post (expanded)</li>
-<li>Pinterest pin</li>
-<li>Facebook post</li>
-<li>Instagram Story highlights</li>
-</ol>
-</section>
-
-<section class="strategy-section">
-<h2>10. 90-DAY REVENUE ROADMAP</h2>
-<div style="background: #F3E8FF; padding: 1rem; border-radius: 0.5rem;">
-<p><strong>Month 1: Build + Test</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Post 7x/week, A/B test hooks</li>
-<li>Goal: 10K followers, identify winning formula</li>
-<li>Revenue: $0 (building audience)</li>
-</ul>
-
-<p style="margin-top: 1rem;"><strong>Month 2: Scale + Monetize</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Double down on winners, start ads ($500)</li>
-<li>Launch digital product ($47-97)</li>
-<li>Goal: 50K followers, $5K revenue</li>
-</ul>
-
-<p style="margin-top: 1rem;"><strong>Month 3: Optimize + Expand</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Scale ads ($1500), influencer collabs</li>
-<li>Launch high-ticket offer ($497-997)</li>
-<li>Goal: 100K followers, $50K revenue</li>
-</ul>
-</div>
-</section>
-
-<section class="strategy-section" style="background: #FEF3C7; padding: 1.5rem; border-radius: 1rem;">
-<h2 style="color: #92400E;">⚠️ EXPERT REALITY CHECK</h2>
-<p style="color: #065F46;"><strong>✅ This works if:</strong> You're data-obsessed, test relentlessly, and scale winners aggressively</p>
-<p style="color: #991B1B; margin-top: 0.5rem;"><strong>❌ This fails if:</strong> You rely on "gut feel" instead of metrics, or give up before finding your viral formula</p>
-
-<div style="margin-top: 1rem; background: white; padding: 1rem; border-radius: 0.5rem;">
-<p style="font-weight: bold; color: #8B5CF6;">💡 EXPERT TIP:</p>
-<p>Your first viral hit is luck. Your second is skill. Your third is a system. Build the system.</p>
-</div>
-</section>
-
-</section>
-
-</div>
-"""
+    blueprint_html = _EXPERT_TEMPLATE.render(view=view)
     
-    sample_posts = [
-        {
-            "type": "Thought Leadership",
-            "hook": f"The {industry} industry is lying to you about {topic}.",
-            "body": "Challenge a common myth with data-backed counter-points. Use a contrarian approach to build authority.",
-            "cta": "Join my masterclass for the full breakdown."
-        },
-        {
-            "type": "Case Study",
-            "hook": f"How we helped a client achieve their {topic} goals in 28 days.",
-            "body": "Highlight the specific 'Amethyst' framework applied and the ROI achieved. Show real data and results.",
-            "cta": "Apply for a 1:1 strategy audit today."
-        }
-    ]
+    sample_posts = _render_sample_posts(_EXPERT_POSTS_TPL, topic=view.topic, industry=view.industry)
     
     return blueprint_html, sample_posts
 
 def generate_strategy_template(topic: str) -> str:
     """Generate 10-section strategy matching coffee format exactly"""
-    # ... (Existing template function remains below)
-    return f"""
-<div class="strategy-sections">
-
-<h1 style="font-size: 2.5rem; font-weight: bold; margin-bottom: 2rem; color: #7C3AED;">
-CONTENT STRATEGY FOR {topic.upper()}
-</h1>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-1. BUSINESS GOAL (Refined)
-</h2>
-<p><strong>Vague Goal:</strong> "Grow {topic} presence"</p>
-<p><strong>SMART Goal:</strong> Generate 50,000 engaged followers and 500 qualified leads in 90 days through educational content and strategic offers.</p>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-2. TARGET AUDIENCE (Narrowed Down)
-</h2>
-<p><strong>Primary Audience (70% focus):</strong> Health-conscious professionals aged 25-40</p>
-<ul style="margin-left: 1.5rem; margin-top: 0.5rem;">
-<li>Active on Instagram 2-3 hours daily</li>
-<li>Values convenience and quality</li>
-<li>Willing to pay premium for results</li>
-<li>Seeks expert guidance and community</li>
-<li>Prefers visual, bite-sized content</li>
-</ul>
-<p><strong>Secondary Audience:</strong> Fitness enthusiasts and wellness advocates</p>
-<p><strong>Recommendation:</strong> Focus 70% on primary audience for maximum conversion</p>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-3. BRAND POSITIONING & UNIQUE ANGLE
-</h2>
-<p><strong>Positioning Options:</strong></p>
-<ol style="margin-left: 1.5rem; margin-top: 0.5rem;">
-<li><strong>The Expert:</strong> Science-backed, data-driven approach</li>
-<li><strong>The Relatable Friend:</strong> Real results, real people</li>
-<li><strong>The Premium Choice:</strong> Luxury experience, exclusive access</li>
-<li><strong>The Community Builder:</strong> Supportive tribe, shared journey</li>
-<li><strong>The Innovator:</strong> Cutting-edge methods, latest trends</li>
-</ol>
-<p><strong>Recommended:</strong> #2 - The Relatable Friend. Authenticity drives engagement and trust.</p>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-4. CONTENT PILLARS (What You'll Actually Post)
-</h2>
-
-<div style="margin-top: 1rem;">
-<h3 style="font-size: 1.25rem; font-weight: 600; color: #7C3AED;">Pillar 1: Educational/Value (30%)</h3>
-<p><strong>5 Reel Examples:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>"5 Signs You Need This" - Problem awareness</li>
-<li>"Common Mistakes to Avoid" - Expert tips</li>
-<li>"How It Works in 60 Seconds" - Quick explainer</li>
-<li>"Before You Start, Know This" - Prerequisites</li>
-<li>"The Science Behind Results" - Credibility builder</li>
-</ul>
-</div>
-
-<div style="margin-top: 1.5rem;">
-<h3 style="font-size: 1.25rem; font-weight: 600; color: #7C3AED;">Pillar 2: Product/Offer (25%)</h3>
-<p><strong>5 Reel Examples:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>"What's Included" - Feature showcase</li>
-<li>"Real Results in 30 Days" - Testimonials</li>
-<li>"Limited Time Offer" - Urgency creator</li>
-<li>"How to Get Started" - CTA focused</li>
-<li>"Why Choose Us" - Differentiation</li>
-</ul>
-</div>
-
-<div style="margin-top: 1.5rem;">
-<h3 style="font-size: 1.25rem; font-weight: 600; color: #7C3AED;">Pillar 3: Lifestyle/Relatable (30%)</h3>
-<p><strong>5 Reel Examples:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>"Day in the Life" - Behind the scenes</li>
-<li>"Relatable Struggles" - Humor + empathy</li>
-<li>"Morning Routine" - Aspirational content</li>
-<li>"Weekend Vibes" - Lifestyle integration</li>
-<li>"Real Talk" - Authentic moments</li>
-</ul>
-</div>
-
-<div style="margin-top: 1.5rem;">
-<h3 style="font-size: 1.25rem; font-weight: 600; color: #7C3AED;">Pillar 4: Community/UGC (15%)</h3>
-<p><strong>5 Reel Examples:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>"Customer Spotlight" - Success stories</li>
-<li>"Q&A Friday" - Engagement driver</li>
-<li>"Challenge Results" - Community wins</li>
-<li>"Your Questions Answered" - Interactive</li>
-<li>"Shoutout Saturday" - Recognition</li>
-</ul>
-</div>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-5. CONTENT EXECUTION PLAN
-</h2>
-<p><strong>Posting Frequency:</strong> 5-7 Reels per week (1-2 daily)</p>
-<p><strong>Best Posting Times:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>7-9 AM (Morning commute)</li>
-<li>12-1 PM (Lunch break)</li>
-<li>7-9 PM (Evening wind-down)</li>
-</ul>
-<p><strong>Reel Format:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Hook: First 3 seconds grab attention</li>
-<li>Length: 15-30 seconds optimal</li>
-<li>CTA: Clear next step (link in bio, comment, share)</li>
-</ul>
-
-<table style="width: 100%; border-collapse: collapse; margin-top: 1rem;">
-<thead>
-<tr style="background: #F3F4F6;">
-<th style="border: 1px solid #E5E7EB; padding: 0.75rem;">Week</th>
-<th style="border: 1px solid #E5E7EB; padding: 0.75rem;">Educational</th>
-<th style="border: 1px solid #E5E7EB; padding: 0.75rem;">Product</th>
-<th style="border: 1px solid #E5E7EB; padding: 0.75rem;">Lifestyle</th>
-<th style="border: 1px solid #E5E7EB; padding: 0.75rem;">Community</th>
-</tr>
-</thead>
-<tbody>
-<tr>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">Week 1</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">1 post</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">1 post</td>
-</tr>
-<tr style="background: #F9FAFB;">
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">Week 2</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">1 post</td>
-</tr>
-<tr>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">Week 3</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">1 post</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">1 post</td>
-</tr>
-<tr style="background: #F9FAFB;">
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">Week 4</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">2 posts</td>
-<td style="border: 1px solid #E5E7EB; padding: 0.75rem;">1 post</td>
-</tr>
-</tbody>
-</table>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-6. CONVERSION STRATEGY
-</h2>
-<p><strong>Link in Bio:</strong> Linktree with 4 options</p>
-<ul style="margin-left: 1.5rem;">
-<li>Free Guide Download (lead magnet)</li>
-<li>Book Consultation (high-intent)</li>
-<li>Shop Products (direct sale)</li>
-<li>Join Community (engagement)</li>
-</ul>
-<p><strong>Stories Integration:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Polls: "Which topic next?"</li>
-<li>Countdowns: Launch announcements</li>
-<li>Quizzes: "What's your type?"</li>
-<li>Questions: Direct engagement</li>
-</ul>
-<p><strong>Instagram Offers:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>"Show this Reel for 15% off"</li>
-<li>"Comment 'READY' for exclusive access"</li>
-<li>"First 50 get bonus package"</li>
-</ul>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-7. HASHTAG STRATEGY
-</h2>
-<p><strong>Large (100k-1M followers):</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>#FitnessMotivation (1.2M)</li>
-<li>#HealthyLifestyle (850K)</li>
-<li>#WellnessJourney (600K)</li>
-<li>#TransformationTuesday (500K)</li>
-</ul>
-<p><strong>Medium (10k-100k):</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>#FitnessCommunity (85K)</li>
-<li>#HealthCoach (45K)</li>
-<li>#WellnessWarrior (30K)</li>
-<li>#MindBodySoul (25K)</li>
-</ul>
-<p><strong>Small/Niche (1k-10k):</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>#YourNiche2024 (5K)</li>
-<li>#LocalFitness (3K)</li>
-<li>#SpecificMethod (2K)</li>
-<li>#CommunityName (1K)</li>
-</ul>
-<p><strong>Usage:</strong> 8-12 hashtags per post, mix all three sizes</p>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-8. METRICS TO TRACK
-</h2>
-<p><strong>Weekly Metrics:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Follower growth rate</li>
-<li>Engagement rate (likes + comments + saves)</li>
-<li>Reach and impressions</li>
-<li>Profile visits</li>
-<li>Link clicks</li>
-</ul>
-<p><strong>Monthly Metrics:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Lead generation (email signups)</li>
-<li>Conversion rate (leads to customers)</li>
-<li>Revenue from Instagram</li>
-<li>Top performing content types</li>
-</ul>
-<p><strong>Goal Benchmarks:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Month 1: 5,000 followers, 5% engagement</li>
-<li>Month 2: 15,000 followers, 7% engagement</li>
-<li>Month 3: 50,000 followers, 10% engagement</li>
-<li>90 days: 500 qualified leads</li>
-</ul>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-9. CONTENT CREATION TIPS
-</h2>
-<p><strong>Equipment:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>iPhone/Android (no fancy camera needed)</li>
-<li>Natural lighting (near windows)</li>
-<li>Simple tripod ($20-30)</li>
-<li>Wireless mic for audio ($50)</li>
-</ul>
-<p><strong>Editing Tools:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>CapCut (free, easy transitions)</li>
-<li>InShot (text overlays)</li>
-<li>Canva (thumbnails, graphics)</li>
-</ul>
-<p><strong>Batch Creation Workflow:</strong></p>
-<ol style="margin-left: 1.5rem;">
-<li>Film 10-15 Reels in one session</li>
-<li>Edit in batches (2-3 hours)</li>
-<li>Schedule with Later or Planoly</li>
-<li>Engage daily (30 min morning + evening)</li>
-</ol>
-<p><strong>Competitor Spy Method:</strong></p>
-<ul style="margin-left: 1.5rem;">
-<li>Follow top 10 competitors</li>
-<li>Save their best-performing Reels</li>
-<li>Adapt (don't copy) their hooks and formats</li>
-<li>Add your unique angle</li>
-</ul>
-</section>
-
-<section class="strategy-section">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin: 2rem 0 1rem; color: #1E3A8A;">
-10. 90-DAY ROADMAP
-</h2>
-<div style="margin-top: 1rem;">
-<h3 style="font-size: 1.25rem; font-weight: 600; color: #7C3AED;">Month 1: Foundation</h3>
-<ul style="margin-left: 1.5rem;">
-<li>Set up profile optimization (bio, highlights, link)</li>
-<li>Create first 30 Reels (batch filming)</li>
-<li>Post 5-7x per week consistently</li>
-<li>Engage 30 min daily (comments, DMs)</li>
-<li>Goal: 5,000 followers, establish brand voice</li>
-</ul>
-</div>
-
-<div style="margin-top: 1.5rem;">
-<h3 style="font-size: 1.25rem; font-weight: 600; color: #7C3AED;">Month 2: Optimization</h3>
-<ul style="margin-left: 1.5rem;">
-<li>Analyze top 10 performing Reels</li>
-<li>Double down on winning formats</li>
-<li>Launch first paid offer/product</li>
-<li>Run Instagram Stories ads ($200-500)</li>
-<li>Goal: 15,000 followers, 100 leads</li>
-</ul>
-</div>
-
-<div style="margin-top: 1.5rem;">
-<h3 style="font-size: 1.25rem; font-weight: 600; color: #7C3AED;">Month 3: Scale</h3>
-<ul style="margin-left: 1.5rem;">
-<li>Collaborate with 5-10 micro-influencers</li>
-<li>Launch UGC campaign (customer testimonials)</li>
-<li>Increase ad spend to $1,000-2,000</li>
-<li>Host live Q&A or workshop</li>
-<li>Goal: 50,000 followers, 500 qualified leads</li>
-</ul>
-</div>
-</section>
-
-<section class="strategy-section" style="background: #FEF3C7; padding: 1.5rem; border-radius: 1rem; border-left: 4px solid #F59E0B;">
-<h2 style="font-size: 1.75rem; font-weight: bold; margin-bottom: 1rem; color: #92400E;">
-⚠️ FINAL REALITY CHECK
-</h2>
-<div style="margin-top: 1rem;">
-<p style="font-weight: 600; color: #065F46; margin-bottom: 0.5rem;">✅ This works if:</p>
-<ul style="margin-left: 1.5rem; color: #065F46;">
-<li>You post consistently (5-7x per week minimum)</li>
-<li>You engage authentically (not just auto-comments)</li>
-<li>You track metrics weekly and adjust</li>
-<li>You batch create content (don't wing it daily)</li>
-<li>You have a clear offer/product to sell</li>
-</ul>
-</div>
-
-<div style="margin-top: 1.5rem;">
-<p style="font-weight: 600; color: #991B1B; margin-bottom: 0.5rem;">❌ This fails if:</p>
-<ul style="margin-left: 1.5rem; color: #991B1B;">
-<li>You post sporadically (2-3x per week)</li>
-<li>You only promote, never provide value</li>
-<li>You ignore comments and DMs</li>
-<li>You don't analyze what's working</li>
-<li>You give up before 90 days</li>
-</ul>
-</div>
-</section>
-
-</div>
-"""
+    return _GENERAL_TEMPLATE.render(topic=topic)
 
 
 def generate_coffee_format_strategy(topic: str) -> str:
@@ -2244,62 +1896,6 @@ async def get_history(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/history/{strategy_id}")
-async def get_strategy_by_id(
-    strategy_id: str,
-    current_user: dict = Depends(get_current_user)
-):
-    """Get a specific strategy by ID"""
-    try:
-        strategy = strategies_collection.find_one({
-            "_id": ObjectId(strategy_id),
-            "user_id": current_user["id"]
-        })
-        
-        if not strategy:
-            raise HTTPException(status_code=404, detail="Strategy not found")
-        
-        # Convert ObjectId to string
-        strategy["id"] = str(strategy["_id"])
-        del strategy["_id"]
-        
-        return {
-            "success": True,
-            **strategy  # Spread the strategy data directly
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Error fetching strategy {strategy_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.delete("/api/history/{strategy_id}")
-async def delete_strategy(
-    strategy_id: str,
-    current_user: dict = Depends(get_current_user)
-):
-    """Delete a strategy by ID"""
-    try:
-        result = strategies_collection.delete_one({
-            "_id": ObjectId(strategy_id),
-            "user_id": current_user["id"]
-        })
-        
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Strategy not found")
-        
-        return {
-            "success": True,
-            "message": "Strategy deleted successfully"
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Error deleting strategy {strategy_id}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
 # ============================================================================
 # RAZORPAY WEBHOOK - Automatic Pro Tier Upgrade
 # ============================================================================
@@ -2307,25 +1903,20 @@ async def delete_strategy(
 @app.post("/api/razorpay/webhook")
 async def razorpay_webhook(request: Request):
     """Handle Razorpay webhook events for subscription management"""
-    if not RAZORPAY_ENABLED:
+    if not RAZORPAY_ENABLED or not RAZORPAY_WEBHOOK_SECRET:
         raise HTTPException(status_code=503, detail="Razorpay not configured")
     
     payload = await request.body()
     signature = request.headers.get("X-Razorpay-Signature")
     
-    # Verify webhook signature
-    try:
-        razorpay_client.utility.verify_webhook_signature(
-            payload.decode(), 
-            signature, 
-            RAZORPAY_WEBHOOK_SECRET
-        )
-    except:
+    # Verify webhook signature (HMAC-SHA256 of the raw body, constant-time compare)
+    # Compared as bytes: compare_digest raises TypeError on non-ASCII str input
+    expected = hmac.new(RAZORPAY_WEBHOOK_SECRET.encode(), payload, hashlib.sha256).hexdigest().encode()
+    if not hmac.compare_digest(expected, (signature or "").encode()):
         raise HTTPException(status_code=400, detail="Invalid signature")
     
     # Parse event
-    import json
-    event = json.loads(payload)
+    event = orjson.loads(payload)
     
     # Handle subscription.activated
     if event['event'] == 'subscription.activated':
@@ -2341,6 +1932,7 @@ async def razorpay_webhook(request: Request):
                     "razorpay_subscription_id": event['payload']['subscription']['entity']['id']
                 }}
             )
+            invalidate_user(user_id)
             print(f"✅ User {user_id} upgraded to Pro via Razorpay")
     
     # Handle subscription.cancelled
@@ -2354,6 +1946,7 @@ async def razorpay_webhook(request: Request):
                 {"_id": ObjectId(user_id)},
                 {"$set": {"tier": "free"}}
             )
+            invalidate_user(user_id)
             print(f"⚠️ User {user_id} downgraded to Free (subscription cancelled)")
     
     return {"status": "success"}
@@ -2363,6 +1956,8 @@ async def razorpay_webhook(request: Request):
 # REFERRAL SYSTEM - Viral Growth ($5K/mo potential)
 # ============================================================================
 
+REFERRAL_CODE_ATTEMPTS = 3
+
 class ReferralCodeInput(BaseModel):
     referral_code: str = Field(..., min_length=6, max_length=10)
 
@@ -2386,9 +1981,25 @@ async def apply_referral(
     if str(referrer["_id"]) == current_user["id"]:
         raise HTTPException(status_code=400, detail="Cannot use your own referral code")
     
-    # Check if already used a referral
-    current_user_doc = users_collection.find_one({"_id": ObjectId(current_user["id"])})
-    if current_user_doc.get("referred_by"):
+    # Check if already used a referral (cheap early exit; the cached user can be
+    # up to 30s stale, so the claim below is what actually enforces it)
+    if current_user.get("referred_by"):
+        raise HTTPException(status_code=400, detail="Referral code already applied")
+    
+    # One timestamp for every field this referral writes
+    now = datetime.now(timezone.utc)
+    
+    # Mark new user as referred - atomically, so concurrent or repeated requests
+    # can only ever claim one referral (and reward the referrer once)
+    claim = users_collection.update_one(
+        {"_id": current_user["oid"], "referred_by": {"$exists": False}},
+        {"$set": {
+            "referred_by": str(referrer["_id"]),
+            "referred_at": now
+        }}
+    )
+    invalidate_user(current_user["id"])
+    if claim.matched_count != 1:
         raise HTTPException(status_code=400, detail="Referral code already applied")
     
     # REWARD REFERRER: 7 days free Pro
@@ -2397,21 +2008,13 @@ async def apply_referral(
         {
             "$set": {
                 "tier": "pro",
-                "pro_until": datetime.now(timezone.utc) + timedelta(days=7),
-                "updated_at": datetime.now(timezone.utc)
+                "pro_until": now + timedelta(days=7),
+                "updated_at": now
             },
             "$inc": {"referral_count": 1}
         }
     )
-    
-    # Mark new user as referred
-    users_collection.update_one(
-        {"_id": ObjectId(current_user["id"])},
-        {"$set": {
-            "referred_by": str(referrer["_id"]),
-            "referred_at": datetime.now(timezone.utc)
-        }}
-    )
+    invalidate_user(referrer["_id"])
     
     return {
         "success": True,
@@ -2424,19 +2027,32 @@ async def get_referral_code(current_user: dict = Depends(get_current_user)):
     """
     Get user's unique referral code (generate if doesn't exist)
     """
-    user_doc = users_collection.find_one({"_id": ObjectId(current_user["id"])})
+    user_doc = current_user
     
     # Generate referral code if doesn't exist
-    if not user_doc.get("referral_code"):
-        import secrets
-        referral_code = secrets.token_urlsafe(6).upper().replace("-", "").replace("_", "")[:8]
-        
-        users_collection.update_one(
-            {"_id": ObjectId(current_user["id"])},
-            {"$set": {"referral_code": referral_code}}
-        )
-    else:
-        referral_code = user_doc["referral_code"]
+    referral_code = user_doc.get("referral_code")
+    if not referral_code:
+        for _ in range(REFERRAL_CODE_ATTEMPTS):
+            # 5 random bytes -> exactly 8 uppercase base32 chars, no padding to strip
+            candidate = base64.b32encode(secrets.token_bytes(5)).decode()
+            try:
+                # Only set it if no concurrent request got there first; the unique index rejects collisions
+                result = users_collection.update_one(
+                    {"_id": current_user["oid"], "referral_code": None},
+                    {"$set": {"referral_code": candidate}}
+                )
+            except DuplicateKeyError:
+                continue
+            invalidate_user(current_user["id"])
+            if result.modified_count:
+                referral_code = candidate
+            else:
+                referral_code = users_collection.find_one(
+                    {"_id": current_user["oid"]}, {"referral_code": 1}
+                )["referral_code"]
+            break
+        else:
+            raise HTTPException(status_code=503, detail="Could not allocate a referral code, please retry")
     
     referral_count = user_doc.get("referral_count", 0)
     
@@ -2494,9 +2110,10 @@ async def update_profile(data: dict, current_user: dict = Depends(get_current_us
         return {"success": False, "message": "No fields to update"}
         
     users_collection.update_one(
-        {"_id": ObjectId(current_user["id"])},
+        {"_id": current_user["oid"]},
         {"$set": update_fields}
     )
+    invalidate_user(current_user["id"])
     
     return {"success": True, "message": "Profile updated successfully"}
 
@@ -2505,24 +2122,30 @@ async def update_profile(data: dict, current_user: dict = Depends(get_current_us
 # FEEDBACK ENDPOINT (VenturusAI Response)
 # ============================================================================
 
+# A valid ObjectId is exactly 24 hex chars; checked before any bson parsing
+_OID_RE = re.compile(r"[0-9a-fA-F]{24}")
+
 @app.post("/feedback")
 async def submit_feedback(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Submit feedback (thumbs up/down) on a strategy"""
     try:
         # Verify token
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        payload = decode_jwt(token)
         user_id = payload.get("sub")
         
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         
         # Get feedback data
-        data = await request.json()
+        data = orjson.loads(await request.body())
         strategy_id = data.get("strategy_id")
         rating = data.get("rating")  # "up" or "down"
         comment = data.get("comment", "")
         
+        if not isinstance(strategy_id, str) or not _OID_RE.fullmatch(strategy_id):
+            raise HTTPException(status_code=400, detail="Invalid strategy ID")
+        
         # Update strategy with feedback
         strategies_collection.update_one(
             {"_id": ObjectId(strategy_id), "user_id": user_id},
@@ -2539,6 +2162,8 @@ async def submit_feedback(request: Request, credentials: HTTPAuthorizationCreden
             "success": True,
             "message": "Feedback submitted successfully"
         }
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.JWTError:
@@ -4,8 +4,11 @@ Includes both Pydantic models (for API validation) and SQLAlchemy models (for da
 """
 
 from datetime import datetime, timedelta, timezone
+from functools import cached_property
 from typing import List, Dict, Optional
 from pydantic import BaseModel, EmailStr, Field
+import hashlib
+import orjson
 
 # SQLAlchemy imports removed - using MongoDB instead
 
@@ -22,6 +25,12 @@ class StrategyInput(BaseModel):
     contentType: str = Field(default="Mixed Content", max_length=50, description="Desired content format (e.g., 'Reels', 'Posts', 'Blogs')")
     experience: str = Field(default="beginner", max_length=50, description="User experience level (beginner/intermediate/expert)")
 
+    @cached_property
+    def cache_key(self) -> str:
+        """Redis strategy cache key - hashed once per request, on first use"""
+        # Bump the prefix to invalidate every cached strategy
+        return hashlib.blake2b(b"v3|" + orjson.dumps(self.model_dump()), digest_size=16).hexdigest()
+
     class Config:
         json_schema_extra = {
             "example": {
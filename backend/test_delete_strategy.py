@@ -1,32 +1,38 @@
-import requests
 import json
+import logging
+import logging.handlers
+import os
 import sys
 
+from tests._http import GENERATE_TIMEOUT, make_session, get_token
+
+# Progress lines are held in memory and written out in one go at the end (or
+# as soon as an ERROR is logged) rather than flushed to stdout per step;
+# logging's atexit shutdown drains the buffer on the sys.exit path too.
+log = logging.getLogger("test_delete_strategy")
+log.setLevel(os.environ.get("LOGLEVEL", "INFO"))
+log.propagate = False
+_stdout = logging.StreamHandler(sys.stdout)
+_stdout.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(logging.handlers.MemoryHandler(capacity=256, flushLevel=logging.ERROR, target=_stdout))
+
 # Configuration
 API_URL = "http://localhost:8000"
 EMAIL = "test@example.com"
 PASSWORD = "password123"
 
-def login():
-    print(f"🔑 Logging in as {EMAIL}...")
+def login(session):
+    log.info("🔑 Logging in as %s...", EMAIL)
     try:
-        response = requests.post(f"{API_URL}/api/auth/login", json={
-            "email": EMAIL,
-            "password": PASSWORD
-        })
-        if response.status_code == 200:
-            token = response.json().get("access_token")
-            print("✅ Login successful")
-            return token
-        else:
-            print(f"❌ Login failed: {response.text}")
-            sys.exit(1)
+        token = get_token(session, EMAIL, PASSWORD)
+        log.info("✅ Login successful")
+        return token
     except Exception as e:
-        print(f"❌ Connection error: {e}")
+        log.error("❌ %s", e)
         sys.exit(1)
 
-def create_dummy_strategy(token):
-    print("\n📝 Creating dummy strategy to delete...")
+def create_dummy_strategy(session, token):
+    log.info("\n📝 Creating dummy strategy to delete...")
     headers = {"Authorization": f"Bearer {token}"}
     data = {
         "goal": "Test Delete Strategy",
@@ -38,7 +44,7 @@ def create_dummy_strategy(token):
     }
     
     try:
-        response = requests.post(f"{API_URL}/api/strategy", json=data, headers=headers)
+        response = session.post("/api/strategy", json=data, headers=headers, timeout=GENERATE_TIMEOUT)
         if response.status_code == 200:
             strategy = response.json().get("strategy")
             # The strategy object structure might vary based on how it's returned
@@ -51,92 +57,100 @@ def create_dummy_strategy(token):
             # We need to get the ID from the history list or look closely at response
             
             # Let's just fetch history to get the ID of the latest one
-            print("✅ Dummy strategy created")
+            log.info("✅ Dummy strategy created")
             return True
         else:
-            print(f"❌ Failed to create strategy: {response.text}")
+            log.error("❌ Failed to create strategy: %s", response.text)
             return False
     except Exception as e:
-        print(f"❌ Error creating strategy: {e}")
+        log.error("❌ Error creating strategy: %s", e)
         return False
 
-def get_latest_strategy_id(token):
-    print("\n📜 Fetching history to find target strategy...")
+def get_latest_strategy_id(session, token):
+    log.info("\n📜 Fetching history to find target strategy...")
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.get(f"{API_URL}/api/history", headers=headers)
+        response = session.get("/api/history", headers=headers, params={"limit": 1})
         if response.status_code == 200:
             data = response.json()
             history = data.get("history", [])
             if not history:
-                print("⚠️ No history found")
+                log.warning("⚠️ No history found")
                 return None
             
             latest = history[0]
-            print(f"✅ Found strategy: {latest.get('goal', 'Unknown')} (ID: {latest.get('id')})")
+            log.info("✅ Found strategy: %s (ID: %s)", latest.get('goal', 'Unknown'), latest.get('id'))
             return latest.get("id")
         else:
-            print(f"❌ Failed to fetch history: {response.text}")
+            log.error("❌ Failed to fetch history: %s", response.text)
             return None
     except Exception as e:
-        print(f"❌ Error fetching history: {e}")
+        log.error("❌ Error fetching history: %s", e)
         return None
 
-def delete_strategy(token, strategy_id):
-    print(f"\n🗑️ Deleting strategy {strategy_id}...")
+def delete_strategy(session, token, strategy_id):
+    log.info("\n🗑️ Deleting strategy %s...", strategy_id)
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.delete(f"{API_URL}/api/history/{strategy_id}", headers=headers)
+        response = session.delete(f"/api/history/{strategy_id}", headers=headers)
         if response.status_code == 200:
-            print("✅ Delete request successful")
+            log.info("✅ Delete request successful")
             return True
         else:
-            print(f"❌ Delete failed: {response.status_code} - {response.text}")
+            log.error("❌ Delete failed: %s - %s", response.status_code, response.text)
             return False
     except Exception as e:
-        print(f"❌ Error deleting strategy: {e}")
+        log.error("❌ Error deleting strategy: %s", e)
         return False
 
-def verify_deletion(token, strategy_id):
-    print(f"\n🔍 Verifying deletion of {strategy_id}...")
+def verify_deletion(session, token, strategy_id):
+    log.info("\n🔍 Verifying deletion of %s...", strategy_id)
     headers = {"Authorization": f"Bearer {token}"}
     try:
         # Try to get specific ID
-        response = requests.get(f"{API_URL}/api/history/{strategy_id}", headers=headers)
+        response = session.get(f"/api/history/{strategy_id}", headers=headers)
         if response.status_code == 404:
-            print("✅ Strategy not found (Confirming deletion)")
+            log.info("✅ Strategy not found (Confirming deletion)")
             return True
         elif response.status_code == 200:
-            print("❌ Strategy still exists!")
+            log.error("❌ Strategy still exists!")
             return False
         else:
-            print(f"⚠️ Unexpected status code: {response.status_code}")
+            log.warning("⚠️ Unexpected status code: %s", response.status_code)
             return False
     except Exception as e:
-        print(f"❌ Error validating deletion: {e}")
+        log.error("❌ Error validating deletion: %s", e)
         return False
 
 def main():
-    token = login()
+    # One keep-alive connection serves every request in the test
+    try:
+        with make_session(API_URL, pool_maxsize=4) as session:
+            run(session)
+    finally:
+        log.handlers[0].flush()
+
+def run(session):
+    token = login(session)
     
     # 1. Create a strategy to delete
-    if create_dummy_strategy(token):
+    if create_dummy_strategy(session, token):
         # 2. Get its ID
-        strategy_id = get_latest_strategy_id(token)
+        strategy_id = get_latest_strategy_id(session, token)
         if strategy_id:
             # 3. Delete it
-            if delete_strategy(token, strategy_id):
+            if delete_strategy(session, token, strategy_id):
                 # 4. Verify it's gone
-                if verify_deletion(token, strategy_id):
-                    print("\n🎉 DELETE TEST PASSED!")
+                if verify_deletion(session, token, strategy_id):
+                    log.info("\n🎉 DELETE TEST PASSED!")
                 else:
-                    print("\n⛔ DELETE TEST FAILED (Strategy still exists)")
+                    log.error("\n⛔ DELETE TEST FAILED (Strategy still exists)")
             else:
-                 print("\n⛔ DELETE TEST FAILED (Delete API error)")
+                 log.error("\n⛔ DELETE TEST FAILED (Delete API error)")
         else:
-            print("\n⛔ DELETE TEST FAILED (Could not retrieve ID)")
+            log.error("\n⛔ DELETE TEST FAILED (Could not retrieve ID)")
     else:
-        print("\n⛔ DELETE TEST FAILED (Could not create dummy strategy)")
+        log.error("\n⛔ DELETE TEST FAILED (Could not create dummy strategy)")
 
 if __name__ == "__main__":
     main()
@@ -1,54 +1,65 @@
-import requests
-import json
+import logging
+import os
+import sys
+
+import orjson
+
+from tests._http import make_client, get_token
+
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stdout)
+log = logging.getLogger(__name__)
 
 BASE_URL = "http://127.0.0.1:8000"
 
 def test_endpoints():
-    print("\n--- Testing New Endpoints ---")
+    log.info("\n--- Testing New Endpoints ---")
     
-    # 1. Login
     email = "debug_user_422@example.com"
     password = "password123"
     
-    session = requests.Session()
-    login_resp = session.post(f"{BASE_URL}/api/auth/login", json={"email": email, "password": password})
-    
-    if login_resp.status_code != 200:
-        print(f"Login failed: {login_resp.text}")
+    with make_client(BASE_URL) as client:
+        run(client, email, password)
+
+
+def run(client, email, password):
+    # 1. Login
+    try:
+        token = get_token(client, email, password)
+    except Exception as e:
+        log.error("%s", e)
         return
 
-    token = login_resp.json()["access_token"]
     headers = {"Authorization": f"Bearer {token}"}
     
     # 2. Get History to find an ID
-    history_resp = session.get(f"{BASE_URL}/api/history", headers=headers)
-    print(f"History Status: {history_resp.status_code}")
+    history_resp = client.get("/api/history", headers=headers, params={"limit": 1})
+    log.info("History Status: %s", history_resp.status_code)
     
-    history_data = history_resp.json()
+    history_data = orjson.loads(history_resp.content)
     strategies = history_data.get("history", [])
     
     if not strategies:
-        print("No strategies found to test GET/DELETE.")
+        log.info("No strategies found to test GET/DELETE.")
         return
 
     strategy_id = strategies[0]["id"]
-    print(f"Testing with Strategy ID: {strategy_id}")
+    log.info("Testing with Strategy ID: %s", strategy_id)
     
     # 3. Test GET /history/{id}
-    print(f"Testing GET /api/history/{strategy_id}...")
-    get_resp = session.get(f"{BASE_URL}/api/history/{strategy_id}", headers=headers)
-    print(f"GET Status: {get_resp.status_code}")
+    log.info("Testing GET /api/history/%s...", strategy_id)
+    get_resp = client.get(f"/api/history/{strategy_id}", headers=headers)
+    log.info("GET Status: %s", get_resp.status_code)
     if get_resp.status_code == 200:
-        print("GET Success!")
+        log.info("GET Success!")
     else:
-        print(f"GET Failed: {get_resp.text}")
+        log.error("GET Failed: %s", get_resp.text)
 
     # 4. Test DELETE /history/{id}
     # Be careful not to delete something important, but this is a debug user.
-    print(f"Testing DELETE /api/history/{strategy_id}...")
-    del_resp = session.delete(f"{BASE_URL}/api/history/{strategy_id}", headers=headers)
-    print(f"DELETE Status: {del_resp.status_code}")
-    print(f"DELETE Response: {del_resp.text}")
+    log.info("Testing DELETE /api/history/%s...", strategy_id)
+    del_resp = client.delete(f"/api/history/{strategy_id}", headers=headers)
+    log.info("DELETE Status: %s", del_resp.status_code)
+    log.info("DELETE Response: %s", del_resp.text)
 
 if __name__ == "__main__":
     test_endpoints()
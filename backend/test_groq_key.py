@@ -1,37 +1,49 @@
 """
 Quick script to get your Groq API key and test CrewAI
 """
+import functools
+import logging
 import os
-from dotenv import load_dotenv
+import sys
 
-load_dotenv()
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stdout)
+log = logging.getLogger(__name__)
 
-groq_key = os.getenv("GROQ_API_KEY", "")
 
-print("=" * 60)
-print("🔑 GROQ API KEY STATUS")
-print("=" * 60)
+@functools.lru_cache(maxsize=1)
+def _env():
+    """Parse .env once per process, however many callers ask for the environment"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.environ.copy()
+
+
+groq_key = _env().get("GROQ_API_KEY", "")
+
+log.info("=" * 60)
+log.info("🔑 GROQ API KEY STATUS")
+log.info("=" * 60)
 
 if groq_key and len(groq_key) > 10:
-    print(f"✅ Groq API Key Found: {groq_key[:10]}...")
-    print(f"   Length: {len(groq_key)} characters")
+    log.info("✅ Groq API Key Found: %s...", groq_key[:10])
+    log.info("   Length: %s characters", len(groq_key))
     
     # Test import
     try:
         from app.services.crew import create_content_strategy_crew
-        print("✅ CrewAI module imported successfully")
-        print("\n🎉 CREWAI IS READY TO USE!")
+        log.info("✅ CrewAI module imported successfully")
+        log.info("\n🎉 CREWAI IS READY TO USE!")
     except Exception as e:
-        print(f"❌ CrewAI import failed: {e}")
+        log.error("❌ CrewAI import failed: %s", e)
 else:
-    print("❌ No Groq API Key found!")
-    print("\n📝 TO GET A FREE GROQ API KEY:")
-    print("   1. Visit: https://console.groq.com")
-    print("   2. Sign up / Log in")
-    print("   3. Click 'API Keys' in sidebar")
-    print("   4. Click 'Create API Key'")
-    print("   5. Copy the key (starts with 'gsk_')")
-    print("   6. Paste it in backend/.env file:")
-    print("      GROQ_API_KEY=gsk_your_key_here")
-
-print("=" * 60)
+    log.error("❌ No Groq API Key found!")
+    log.info("\n📝 TO GET A FREE GROQ API KEY:")
+    log.info("   1. Visit: https://console.groq.com")
+    log.info("   2. Sign up / Log in")
+    log.info("   3. Click 'API Keys' in sidebar")
+    log.info("   4. Click 'Create API Key'")
+    log.info("   5. Copy the key (starts with 'gsk_')")
+    log.info("   6. Paste it in backend/.env file:")
+    log.info("      GROQ_API_KEY=gsk_your_key_here")
+
+log.info("=" * 60)
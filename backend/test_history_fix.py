@@ -2,8 +2,17 @@
 Test script to verify the history bug fix
 Tests that each strategy returns ONLY its own data, not mixed data
 """
-import requests
-import json
+import asyncio
+import logging
+import os
+import sys
+
+import orjson
+
+from tests._http import make_async_client
+
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stdout)
+log = logging.getLogger(__name__)
 
 BASE_URL = "http://localhost:8000"
 
@@ -15,62 +24,70 @@ headers = {
     "Content-Type": "application/json"
 }
 
-print("=" * 70)
-print("AGENTFORGE HISTORY BUG TEST")
-print("=" * 70)
+async def main():
+    log.info("=" * 70)
+    log.info("AGENTFORGE HISTORY BUG TEST")
+    log.info("=" * 70)
+
+    async with make_async_client(BASE_URL) as client:
+        await run(client)
+
+    log.info("\n" + "=" * 70)
+
+
+def report_strategy(step, n, strategy_id, industry, response):
+    """Print what GET /api/history/{id} returned for one strategy; the parsed body on success, else None"""
+    log.info("\n%s Testing GET /api/history/%s...", step, strategy_id)
+    log.info("   Strategy %s: %s", n, industry)
+    if response.status_code != 200:
+        log.error("❌ Strategy %s failed: %s - %s", n, response.status_code, response.text)
+        return None
+    data = orjson.loads(response.content)
+    log.info("✅ Strategy %s loaded", n)
+    log.info("   Has personas: %s", bool(data.get('personas')))
+    log.info("   Has keywords: %s", bool(data.get('keywords')))
+    log.info("   Has strategic_guidance: %s", bool(data.get('strategic_guidance')))
+    log.info("   Industry: %s", data.get('industry'))
+    return data
+
 
-# Test 1: Get history list
-print("\n1️⃣ Testing GET /api/history...")
-try:
-    response = requests.get(f"{BASE_URL}/api/history", headers=headers)
-    print(f"Status: {response.status_code}")
-    
-    if response.status_code == 200:
-        data = response.json()
-        history = data.get('history', [])
-        print(f"✅ Found {len(history)} strategies")
+async def run(client):
+    # Test 1: Get history list
+    log.info("\n1️⃣ Testing GET /api/history...")
+    try:
+        async with client.stream("GET", "/api/history", headers=headers, params={"limit": 2}) as response:
+            body = b"".join([chunk async for chunk in response.aiter_bytes()])
+        log.info("Status: %s", response.status_code)
         
-        if len(history) >= 2:
-            # Test 2: Get first strategy
-            strategy1_id = history[0].get('id') or history[0].get('_id')
-            strategy1_industry = history[0].get('industry', 'Unknown')
+        if response.status_code == 200:
+            data = orjson.loads(body)
+            history = data.get('history', [])
+            log.info("✅ Found %s strategies", len(history))
             
-            print(f"\n2️⃣ Testing GET /api/history/{strategy1_id}...")
-            print(f"   Strategy 1: {strategy1_industry}")
-            
-            response1 = requests.get(f"{BASE_URL}/api/history/{strategy1_id}", headers=headers)
-            if response1.status_code == 200:
-                data1 = response1.json()
-                print(f"✅ Strategy 1 loaded")
-                print(f"   Has personas: {bool(data1.get('personas'))}")
-                print(f"   Has keywords: {bool(data1.get('keywords'))}")
-                print(f"   Has strategic_guidance: {bool(data1.get('strategic_guidance'))}")
-                print(f"   Industry: {data1.get('industry')}")
-                
-                # Test 3: Get second strategy
+            if len(history) >= 2:
+                strategy1_id = history[0].get('id') or history[0].get('_id')
+                strategy1_industry = history[0].get('industry', 'Unknown')
                 strategy2_id = history[1].get('id') or history[1].get('_id')
                 strategy2_industry = history[1].get('industry', 'Unknown')
                 
-                print(f"\n3️⃣ Testing GET /api/history/{strategy2_id}...")
-                print(f"   Strategy 2: {strategy2_industry}")
+                # Tests 2 + 3: the two detail fetches don't depend on each other, so overlap them
+                response1, response2 = await asyncio.gather(
+                    client.get(f"/api/history/{strategy1_id}", headers=headers),
+                    client.get(f"/api/history/{strategy2_id}", headers=headers)
+                )
                 
-                response2 = requests.get(f"{BASE_URL}/api/history/{strategy2_id}", headers=headers)
-                if response2.status_code == 200:
-                    data2 = response2.json()
-                    print(f"✅ Strategy 2 loaded")
-                    print(f"   Has personas: {bool(data2.get('personas'))}")
-                    print(f"   Has keywords: {bool(data2.get('keywords'))}")
-                    print(f"   Has strategic_guidance: {bool(data2.get('strategic_guidance'))}")
-                    print(f"   Industry: {data2.get('industry')}")
-                    
+                data1 = report_strategy("2️⃣", 1, strategy1_id, strategy1_industry, response1)
+                data2 = report_strategy("3️⃣", 2, strategy2_id, strategy2_industry, response2)
+                
+                if data1 is not None and data2 is not None:
                     # Test 4: Verify data isolation
-                    print(f"\n4️⃣ Verifying Data Isolation...")
+                    log.info("\n4️⃣ Verifying Data Isolation...")
                     
                     # Check if industries are different
                     if data1.get('industry') != data2.get('industry'):
-                        print(f"✅ Industries are different: '{data1.get('industry')}' vs '{data2.get('industry')}'")
+                        log.info("✅ Industries are different: '%s' vs '%s'", data1.get('industry'), data2.get('industry'))
                     else:
-                        print(f"⚠️  Industries are same (might be expected if user generated same industry)")
+                        log.warning("⚠️  Industries are same (might be expected if user generated same industry)")
                     
                     # Check if personas are different
                     personas1 = data1.get('personas', [])
@@ -79,11 +96,11 @@ try:
                     if personas1 and personas2:
                         persona1_name = personas1[0].get('name') if personas1 else None
                         persona2_name = personas2[0].get('name') if personas2 else None
-                        
+                    
                         if persona1_name != persona2_name:
-                            print(f"✅ Personas are different: '{persona1_name}' vs '{persona2_name}'")
+                            log.info("✅ Personas are different: '%s' vs '%s'", persona1_name, persona2_name)
                         else:
-                            print(f"❌ BUG: Personas are identical! Data might be mixed!")
+                            log.error("❌ BUG: Personas are identical! Data might be mixed!")
                     
                     # Check if keywords are different
                     keywords1 = data1.get('keywords', [])
@@ -92,30 +109,32 @@ try:
                     if keywords1 and keywords2:
                         keyword1_term = keywords1[0].get('term') if keywords1 else None
                         keyword2_term = keywords2[0].get('term') if keywords2 else None
-                        
+                    
                         if keyword1_term != keyword2_term:
-                            print(f"✅ Keywords are different: '{keyword1_term}' vs '{keyword2_term}'")
+                            log.info("✅ Keywords are different: '%s' vs '%s'", keyword1_term, keyword2_term)
                         else:
-                            print(f"❌ BUG: Keywords are identical! Data might be mixed!")
+                            log.error("❌ BUG: Keywords are identical! Data might be mixed!")
                     
-                    print(f"\n5️⃣ Summary:")
-                    print(f"   Strategy 1 ID: {strategy1_id}")
-                    print(f"   Strategy 2 ID: {strategy2_id}")
-                    print(f"   Data properly isolated: {data1.get('industry') != data2.get('industry')}")
+                    log.info("\n5️⃣ Summary:")
+                    log.info("   Strategy 1 ID: %s", strategy1_id)
+                    log.info("   Strategy 2 ID: %s", strategy2_id)
+                    log.info("   Data properly isolated: %s", data1.get('industry') != data2.get('industry'))
                     
+            else:
+                log.warning("⚠️  Need at least 2 strategies to test. Found: %s", len(history))
+                log.info("   Please generate 2+ strategies first")
         else:
-            print(f"⚠️  Need at least 2 strategies to test. Found: {len(history)}")
-            print(f"   Please generate 2+ strategies first")
-    else:
-        print(f"❌ Error: {response.status_code}")
-        print(response.text)
+            log.error("❌ Error: %s", response.status_code)
+            log.error("%s", body.decode(errors="replace"))
         
-except Exception as e:
-    print(f"❌ Error: {e}")
-    print("\nTo run this test:")
-    print("1. Log in to the app at http://localhost:5173")
-    print("2. Open browser console and run: localStorage.getItem('token')")
-    print("3. Copy the token and paste it in this script")
-    print("4. Run: python test_history_fix.py")
+    except Exception as e:
+        log.error("❌ Error: %s", e)
+        log.info("\nTo run this test:")
+        log.info("1. Log in to the app at http://localhost:5173")
+        log.info("2. Open browser console and run: localStorage.getItem('token')")
+        log.info("3. Copy the token and paste it in this script")
+        log.info("4. Run: python test_history_fix.py")
+
 
-print("\n" + "=" * 70)
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,31 +1,31 @@
-import requests
-import json
+import logging
+import os
 import sys
 
+import orjson
+
+from tests._http import GENERATE_TIMEOUT, make_session, get_token
+
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stdout)
+log = logging.getLogger(__name__)
+
 # Configuration
 API_URL = "http://localhost:8000"
 EMAIL = "test@example.com"
 PASSWORD = "password123"
+# The only detail keys the structure check inspects; also sent as ?fields= so the server projects just these
+REQUIRED_KEYS = ["personas", "keywords", "competitor_gaps", "content_calendar", "sample_posts"]
 
-def login():
-    print(f"🔑 Logging in as {EMAIL}...")
+def login(session):
+    log.info("🔑 Logging in as %s...", EMAIL)
     try:
-        response = requests.post(f"{API_URL}/api/auth/login", json={
-            "email": EMAIL,
-            "password": PASSWORD
-        })
-        if response.status_code == 200:
-            token = response.json().get("access_token")
-            return token
-        else:
-            print(f"❌ Login failed: {response.text}")
-            sys.exit(1)
+        return get_token(session, EMAIL, PASSWORD)
     except Exception as e:
-        print(f"❌ Connection error: {e}")
+        log.error("❌ %s", e)
         sys.exit(1)
 
-def create_dummy_strategy(token):
-    print("\n📝 Creating dummy strategy for testing...")
+def create_dummy_strategy(session, token):
+    log.info("\n📝 Creating dummy strategy for testing...")
     headers = {"Authorization": f"Bearer {token}"}
     data = {
         "goal": "Test Structure Strategy",
@@ -37,86 +37,90 @@ def create_dummy_strategy(token):
     }
     
     try:
-        response = requests.post(f"{API_URL}/api/strategy", json=data, headers=headers)
+        response = session.post("/api/strategy", json=data, headers=headers, timeout=GENERATE_TIMEOUT)
         if response.status_code == 200:
-            print("✅ Dummy strategy created")
+            log.info("✅ Dummy strategy created")
             return True
         else:
-            print(f"❌ Failed to create strategy: {response.text}")
+            log.error("❌ Failed to create strategy: %s", response.text)
             return False
     except Exception as e:
-        print(f"❌ Error creating strategy: {e}")
+        log.error("❌ Error creating strategy: %s", e)
         return False
 
-def check_history_structure(token):
-    print("\n📜 Fetching history list...")
+def check_history_structure(session, token):
+    log.info("\n📜 Fetching history list...")
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.get(f"{API_URL}/api/history", headers=headers)
+        response = session.get("/api/history", headers=headers, params={"limit": 1})
         if response.status_code != 200:
-            print(f"❌ Failed to fetch history: {response.text}")
+            log.error("❌ Failed to fetch history: %s", response.text)
             return False
             
-        data = response.json()
+        data = orjson.loads(response.content)
         history = data.get("history", [])
         
         if not history:
-            print("⚠️ No history found. Generating one now...")
-            if create_dummy_strategy(token):
+            log.warning("⚠️ No history found. Generating one now...")
+            if create_dummy_strategy(session, token):
                 # Fetch again
-                response = requests.get(f"{API_URL}/api/history", headers=headers)
-                data = response.json()
+                response = session.get("/api/history", headers=headers, params={"limit": 1})
+                data = orjson.loads(response.content)
                 history = data.get("history", [])
             else:
                 return False
         
         if not history:
-            print("❌ Still no history after generation attempt.")
+            log.error("❌ Still no history after generation attempt.")
             return False
             
         latest_id = history[0].get("id")
-        print(f"✅ Found latest strategy ID: {latest_id}")
+        log.info("✅ Found latest strategy ID: %s", latest_id)
         
         # Now fetch the details
-        print(f"\n🔍 Fetching details for {latest_id}...")
-        detail_response = requests.get(f"{API_URL}/api/history/{latest_id}", headers=headers)
+        log.info("\n🔍 Fetching details for %s...", latest_id)
+        detail_response = session.get(
+            f"/api/history/{latest_id}",
+            headers=headers,
+            params={"fields": ",".join(REQUIRED_KEYS)}
+        )
         if detail_response.status_code != 200:
-            print(f"❌ Failed to fetch details: {detail_response.text}")
+            log.error("❌ Failed to fetch details: %s", detail_response.text)
             return False
             
-        details = detail_response.json()
+        details = orjson.loads(detail_response.content)
         
         # CRITICAL CHECK: Are keys at top level?
         # Note: 'strategic_guidance' might be missing in demo mode or simple generation?
         # Let's check for at least ONE of the key content blocks.
-        required_keys = ["personas", "keywords", "competitor_gaps", "content_calendar", "sample_posts"]
         missing = []
         
-        print("\nChecking for top-level keys:")
+        log.info("\nChecking for top-level keys:")
         found_count = 0
-        for key in required_keys:
+        for key in REQUIRED_KEYS:
             if key in details:
-                print(f"  ✅ {key}: Found")
+                log.info("  ✅ %s: Found", key)
                 found_count += 1
             else:
-                print(f"  ❌ {key}: MISSING")
+                log.error("  ❌ %s: MISSING", key)
                 missing.append(key)
         
         # In demo mode, some might be missing depending on implementation, but let's be strict for now.
         if found_count < 3: 
-             print(f"\n⛔ STRUCTURE CHECK FAILED: Too many missing keys {missing}")
+             log.error("\n⛔ STRUCTURE CHECK FAILED: Too many missing keys %s", missing)
              return False
         
         if "output_data" in details:
-             print("\nℹ️ 'output_data' key exists (expected for backward compat or raw storage)")
+             log.info("\nℹ️ 'output_data' key exists (expected for backward compat or raw storage)")
 
-        print(f"\n🎉 STRUCTURE CHECK PASSED! Data is properly flattened.")
+        log.info("\n🎉 STRUCTURE CHECK PASSED! Data is properly flattened.")
         return True
             
     except Exception as e:
-        print(f"❌ Error during check: {e}")
+        log.error("❌ Error during check: %s", e)
         return False
 
 if __name__ == "__main__":
-    token = login()
-    check_history_structure(token)
+    with make_session(API_URL) as session:
+        token = login(session)
+        check_history_structure(session, token)
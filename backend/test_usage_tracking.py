@@ -11,14 +11,19 @@ Test scenarios:
 4. Change month        → usage resets to 0
 """
 
+import logging
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from pymongo import InsertOne, ReturnDocument
+
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stdout)
+log = logging.getLogger(__name__)
 
 # ============================================================================
 # Test Configuration
@@ -26,20 +31,43 @@ from bson import ObjectId
 
 TEST_USER_EMAIL = "test_usage_tracking@planvix-test.com"
 FREE_MONTHLY_LIMIT = 3
+USAGE_PROJECTION = {"usage_count": 1, "usage_month": 1, "_id": 0}
 PASSED = 0
 FAILED = 0
 
 
-def log_pass(msg):
+def log_pass(msg, *args):
     global PASSED
     PASSED += 1
-    print(f"  ✅ PASS: {msg}")
+    log.info("  ✅ PASS: " + msg, *args)
 
 
-def log_fail(msg):
+def log_fail(msg, *args):
     global FAILED
     FAILED += 1
-    print(f"  ❌ FAIL: {msg}")
+    log.error("  ❌ FAIL: " + msg, *args)
+
+
+def usage_snapshot(users_collection, strategies_collection, user_id):
+    """
+    One aggregation round trip for the state TESTS 2-3 inspect: the user's
+    usage fields plus each of their strategies' is_deleted flag.
+    strategies.user_id holds the string form of users._id, hence the $toString.
+    """
+    pipeline = [
+        {"$match": {"_id": user_id}},
+        {"$lookup": {
+            "from": strategies_collection.name,
+            "let": {"uid": {"$toString": "$_id"}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$user_id", "$$uid"]}}},
+                {"$project": {"is_deleted": 1}}
+            ],
+            "as": "strategies"
+        }},
+        {"$project": {"usage_count": 1, "usage_month": 1, "strategies": 1, "_id": 0}}
+    ]
+    return next(users_collection.aggregate(pipeline), None)
 
 
 def run_tests():
@@ -48,30 +76,29 @@ def run_tests():
     # Import after path setup
     from app.core.mongo import users_collection, strategies_collection
 
-    current_month = datetime.now(timezone.utc).strftime("%Y-%m")
+    now = datetime.now(timezone.utc)
+    current_month = now.strftime("%Y-%m")
 
     # ========================================================================
     # SETUP: Create test user
     # ========================================================================
-    print("\n🔧 Setting up test environment...")
+    log.info("\n🔧 Setting up test environment...")
 
     # Clean up any previous test data
     users_collection.delete_many({"email": TEST_USER_EMAIL})
     test_user_id_str = None
 
-    # Create test user with usage tracking fields
+    # Create test user with only the fields the usage checks touch
     user_doc = {
         "email": TEST_USER_EMAIL,
-        "hashed_password": "test_hash_not_real",
         "tier": "free",
         "usage_count": 0,
-        "usage_month": current_month,
-        "created_at": datetime.now(timezone.utc)
+        "usage_month": current_month
     }
     result = users_collection.insert_one(user_doc)
     test_user_id = result.inserted_id
     test_user_id_str = str(test_user_id)
-    print(f"   Created test user: {test_user_id_str}")
+    log.info("   Created test user: %s", test_user_id_str)
 
     strategy_ids = []
 
@@ -79,11 +106,13 @@ def run_tests():
         # ====================================================================
         # TEST 1: Generate 3 strategies → usage_count = 3
         # ====================================================================
-        print("\n📋 TEST 1: Generate 3 strategies")
+        log.info("\n📋 TEST 1: Generate 3 strategies")
 
-        for i in range(3):
-            # Simulate strategy creation: insert strategy doc + increment usage
-            strategy_doc = {
+        # Simulate strategy creation: ids are assigned client-side so all 3
+        # inserts go out as one unordered bulk_write
+        docs = [
+            {
+                "_id": ObjectId(),
                 "user_id": test_user_id_str,
                 "goal": f"Test Strategy {i+1}",
                 "audience": "Test Audience",
@@ -91,60 +120,65 @@ def run_tests():
                 "platform": "Instagram",
                 "content_type": "Mixed",
                 "strategy_mode": "conservative",
-                "created_at": datetime.now(timezone.utc),
+                # 1ms apart so created_at sorts in insertion order
+                "created_at": now + timedelta(milliseconds=i),
                 "is_deleted": False
             }
-            s_result = strategies_collection.insert_one(strategy_doc)
-            strategy_ids.append(s_result.inserted_id)
-
-            # Increment usage (same logic as _increment_usage_mongo)
-            inc_result = users_collection.update_one(
-                {"_id": test_user_id, "usage_month": current_month},
-                {"$inc": {"usage_count": 1}}
-            )
-            if inc_result.matched_count == 0:
-                users_collection.update_one(
-                    {"_id": test_user_id},
-                    {"$set": {"usage_count": 1, "usage_month": current_month}}
-                )
+            for i in range(3)
+        ]
+        strategies_collection.bulk_write([InsertOne(doc) for doc in docs], ordered=False)
+        strategy_ids.extend(doc["_id"] for doc in docs)
 
-        user = users_collection.find_one({"_id": test_user_id})
+        # Increment usage for all 3 at once (upsert seeds the fields if missing)
+        user = users_collection.find_one_and_update(
+            {"_id": test_user_id},
+            {"$inc": {"usage_count": 3}, "$set": {"usage_month": current_month}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection=USAGE_PROJECTION
+        )
         if user["usage_count"] == 3:
-            log_pass(f"usage_count = {user['usage_count']} after 3 generations")
+            log_pass("usage_count = %s after 3 generations", user['usage_count'])
         else:
-            log_fail(f"usage_count = {user['usage_count']}, expected 3")
+            log_fail("usage_count = %s, expected 3", user['usage_count'])
 
         # ====================================================================
         # TEST 2: Delete 1 strategy → usage_count must still be 3
         # ====================================================================
-        print("\n📋 TEST 2: Delete 1 strategy (soft delete)")
+        log.info("\n📋 TEST 2: Delete 1 strategy (soft delete)")
 
         # Soft delete the first strategy (same as delete_strategy service)
-        strategies_collection.update_one(
+        delete_result = strategies_collection.update_one(
             {"_id": strategy_ids[0], "user_id": test_user_id_str},
             {"$set": {"is_deleted": True, "deleted_at": datetime.now(timezone.utc)}}
         )
 
-        # Verify strategy is soft-deleted
-        deleted_doc = strategies_collection.find_one({"_id": strategy_ids[0]})
-        if deleted_doc.get("is_deleted") == True:
+        # Verify strategy is soft-deleted (the write's own result confirms it)
+        if delete_result.modified_count == 1:
             log_pass("Strategy soft-deleted successfully")
         else:
             log_fail("Strategy was not soft-deleted")
 
+        # Nothing is written again until TEST 4, so TESTS 2-3 share one snapshot
+        user = usage_snapshot(users_collection, strategies_collection, test_user_id)
+
+        deleted = [st["_id"] for st in user["strategies"] if st.get("is_deleted")]
+        if deleted == [strategy_ids[0]]:
+            log_pass("Only the deleted strategy is flagged is_deleted")
+        else:
+            log_fail("is_deleted flagged on %s, expected only %s", deleted, strategy_ids[0])
+
         # Check usage_count is unchanged
-        user = users_collection.find_one({"_id": test_user_id})
         if user["usage_count"] == 3:
-            log_pass(f"usage_count = {user['usage_count']} (unchanged after delete)")
+            log_pass("usage_count = %s (unchanged after delete)", user['usage_count'])
         else:
-            log_fail(f"usage_count = {user['usage_count']}, expected 3 (delete affected usage!)")
+            log_fail("usage_count = %s, expected 3 (delete affected usage!)", user['usage_count'])
 
         # ====================================================================
         # TEST 3: Try generating a 4th strategy → must be blocked
         # ====================================================================
-        print("\n📋 TEST 3: Attempt 4th generation (should be blocked)")
+        log.info("\n📋 TEST 3: Attempt 4th generation (should be blocked)")
 
-        user = users_collection.find_one({"_id": test_user_id})
         usage_count = user.get("usage_count", 0)
         usage_month = user.get("usage_month", "")
 
@@ -154,37 +188,39 @@ def run_tests():
 
         blocked = usage_count >= FREE_MONTHLY_LIMIT
         if blocked:
-            log_pass(f"Generation blocked (usage_count={usage_count} >= limit={FREE_MONTHLY_LIMIT})")
+            log_pass("Generation blocked (usage_count=%s >= limit=%s)", usage_count, FREE_MONTHLY_LIMIT)
         else:
-            log_fail(f"Generation NOT blocked (usage_count={usage_count}, limit={FREE_MONTHLY_LIMIT})")
+            log_fail("Generation NOT blocked (usage_count=%s, limit=%s)", usage_count, FREE_MONTHLY_LIMIT)
 
         # ====================================================================
         # TEST 4: Change month → usage resets to 0
         # ====================================================================
-        print("\n📋 TEST 4: Simulate month change → usage resets")
+        log.info("\n📋 TEST 4: Simulate month change → usage resets")
 
         # Simulate month change by setting usage_month to a past month
-        users_collection.update_one(
+        user = users_collection.find_one_and_update(
             {"_id": test_user_id},
-            {"$set": {"usage_month": "2025-01"}}
+            {"$set": {"usage_month": "2025-01"}},
+            return_document=ReturnDocument.AFTER,
+            projection=USAGE_PROJECTION
         )
 
         # Now simulate the check_monthly_limit logic
-        user = users_collection.find_one({"_id": test_user_id})
         usage_month = user.get("usage_month", "")
 
         if usage_month != current_month:
             # Reset (same logic as check_monthly_limit)
-            users_collection.update_one(
+            user = users_collection.find_one_and_update(
                 {"_id": test_user_id},
-                {"$set": {"usage_count": 0, "usage_month": current_month}}
+                {"$set": {"usage_count": 0, "usage_month": current_month}},
+                return_document=ReturnDocument.AFTER,
+                projection=USAGE_PROJECTION
             )
 
-        user = users_collection.find_one({"_id": test_user_id})
         if user["usage_count"] == 0 and user["usage_month"] == current_month:
-            log_pass(f"usage_count reset to 0 after month change")
+            log_pass("usage_count reset to 0 after month change")
         else:
-            log_fail(f"Reset failed: usage_count={user['usage_count']}, usage_month={user['usage_month']}")
+            log_fail("Reset failed: usage_count=%s, usage_month=%s", user['usage_count'], user['usage_month'])
 
         # Verify generation is now allowed
         blocked = user["usage_count"] >= FREE_MONTHLY_LIMIT
@@ -197,28 +233,28 @@ def run_tests():
         # ====================================================================
         # CLEANUP
         # ====================================================================
-        print("\n🧹 Cleaning up test data...")
+        log.info("\n🧹 Cleaning up test data...")
         strategies_collection.delete_many({"user_id": test_user_id_str})
         users_collection.delete_one({"_id": test_user_id})
-        print("   Cleaned up test user and strategies")
+        log.info("   Cleaned up test user and strategies")
 
     # ========================================================================
     # RESULTS
     # ========================================================================
-    print(f"\n{'='*60}")
-    print(f"  RESULTS: {PASSED} passed, {FAILED} failed")
-    print(f"{'='*60}")
+    log.info("\n" + "=" * 60)
+    log.info("  RESULTS: %s passed, %s failed", PASSED, FAILED)
+    log.info("=" * 60)
 
     if FAILED > 0:
-        print("\n⛔ SOME TESTS FAILED!")
+        log.error("\n⛔ SOME TESTS FAILED!")
         sys.exit(1)
     else:
-        print("\n🎉 ALL TESTS PASSED!")
+        log.info("\n🎉 ALL TESTS PASSED!")
         sys.exit(0)
 
 
 if __name__ == "__main__":
-    print("=" * 60)
-    print("  PLANVIX: Usage Tracking Fix - Validation Test")
-    print("=" * 60)
+    log.info("=" * 60)
+    log.info("  PLANVIX: Usage Tracking Fix - Validation Test")
+    log.info("=" * 60)
     run_tests()
@@ -0,0 +1,93 @@
+"""
+Shared HTTP plumbing for the backend smoke-test scripts.
+One pooled, retrying client per script run instead of a fresh
+connection for every call.
+"""
+
+from importlib.util import find_spec
+from typing import Union
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds, so a hung backend fails the script instead of stalling it
+TIMEOUT = (3, 15)
+# POST /api/strategy runs the whole agent crew, which routinely outlasts the default read timeout
+GENERATE_TIMEOUT = (3, 120)
+
+
+def _retry() -> Retry:
+    # raise_on_status=False: once retries run out, hand back the last response
+    # so the scripts can still print its status code and body
+    return Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET", "POST", "DELETE"],
+        raise_on_status=False
+    )
+
+
+def _httpx_timeout() -> httpx.Timeout:
+    connect, read = TIMEOUT
+    return httpx.Timeout(read, connect=connect)
+
+
+class BaseUrlSession(requests.Session):
+    """requests.Session that resolves paths like "/api/history" against base_url"""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith("/"):
+            url = self.base_url + url
+        kwargs.setdefault("timeout", TIMEOUT)
+        return super().request(method, url, *args, **kwargs)
+
+
+def make_session(base_url: str, pool_maxsize: int = 10) -> BaseUrlSession:
+    """Session with a keep-alive pool and urllib3 retries mounted for http and https"""
+    session = BaseUrlSession(base_url)
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=_retry())
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def make_client(base_url: str) -> httpx.Client:
+    """
+    httpx.Client that keeps one connection alive for the whole script.
+    HTTP/2 is negotiated (via ALPN, so https only) when the optional h2 package is installed.
+    """
+    transport = httpx.HTTPTransport(
+        http2=find_spec("h2") is not None,
+        limits=httpx.Limits(max_keepalive_connections=5),
+        retries=3
+    )
+    return httpx.Client(base_url=base_url, transport=transport, timeout=_httpx_timeout())
+
+
+def make_async_client(base_url: str) -> httpx.AsyncClient:
+    """AsyncClient for overlapping independent requests with asyncio.gather over a small keep-alive pool"""
+    # limits go on the transport: AsyncClient ignores its own limits= once a transport is passed
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        retries=3
+    )
+    return httpx.AsyncClient(base_url=base_url, transport=transport, timeout=_httpx_timeout())
+
+
+class LoginError(RuntimeError):
+    pass
+
+
+def get_token(session: Union[requests.Session, httpx.Client], email: str, password: str) -> str:
+    """Log in and return the access token; raises LoginError with the server's reply on failure"""
+    response = session.post("/api/auth/login", json={"email": email, "password": password})
+    if response.status_code != 200:
+        raise LoginError(f"Login failed: {response.status_code} - {response.text}")
+    return response.json()["access_token"]